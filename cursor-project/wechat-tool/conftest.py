@@ -0,0 +1,12 @@
+"""
+pytest 配置
+在收集测试前把项目根目录加入 Python 路径，整个测试会话只执行一次
+"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径，已存在时不重复添加
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+if _ROOT not in sys.path:
+    sys.path.insert(0, _ROOT)
@@ -3,11 +3,28 @@
 包含机器人的核心功能组件
 """
 
-from .bot import WeChatBot
-from .base_plugin import BasePlugin
-from .config_manager import ConfigManager
-from .message_handler import MessageHandler
-from .plugin_manager import PluginManager
+import importlib
+
+# 导出名 -> 所在子模块；按需导入，避免只用到配置管理器时也加载 itchat 等重依赖
+_EXPORTS = {
+    'WeChatBot': '.bot',
+    'BasePlugin': '.base_plugin',
+    'ConfigManager': '.config_manager',
+    'MessageHandler': '.message_handler',
+    'PluginManager': '.plugin_manager',
+}
+
+
+def __getattr__(name):
+    """首次访问导出名时再导入对应子模块"""
+    try:
+        module_name = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     'WeChatBot',
@@ -30,6 +30,16 @@ class BasePlugin(ABC):
         """停止插件"""
         pass
     
+    def __enter__(self) -> "BasePlugin":
+        """进入 with 语句时启动插件"""
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        """离开 with 语句时停止插件，即使语句块内抛出异常"""
+        self.stop()
+        return False
+    
     def execute_command(self, command: str, **kwargs) -> Any:
         """执行插件命令"""
         raise NotImplementedError(f"插件 {self.name} 不支持命令执行")
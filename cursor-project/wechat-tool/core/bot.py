@@ -5,8 +5,9 @@
 
 import os
 import sys
-import asyncio
+import queue
 import importlib
+import threading
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 
@@ -20,6 +21,13 @@ from core.message_handler import MessageHandler
 from core.config_manager import ConfigManager
 
 
+# 消息处理线程每批最多取出的消息数
+MESSAGE_BATCH_SIZE = 32
+
+# 本进程中已创建过的目录，重复调用时跳过 mkdir
+_CREATED_DIRS = set()
+
+
 class WeChatBot:
     """微信机器人主类"""
     
@@ -32,12 +40,19 @@ class WeChatBot:
         self.message_handler.plugin_manager = self.plugin_manager
         self.is_running = False
         
+        # 消息队列: itchat 回调只负责入队，由后台线程批量处理
+        self._msg_queue: "queue.Queue" = queue.Queue()
+        self._msg_thread = None
+        
         # 创建必要的目录
         self._create_directories()
         
         # 设置日志
         self._setup_logging()
         
+        # 加载需要预加载的插件，其余插件按需加载
+        self.plugin_manager.load_plugins()
+        
         logger.info("微信机器人初始化完成")
     
     def _create_directories(self):
@@ -51,7 +66,10 @@ class WeChatBot:
         ]
         
         for directory in directories:
+            if directory in _CREATED_DIRS:
+                continue
             Path(directory).mkdir(parents=True, exist_ok=True)
+            _CREATED_DIRS.add(directory)
     
     def _setup_logging(self):
         """设置日志配置"""
@@ -73,6 +91,7 @@ class WeChatBot:
             
             # 注册消息处理器
             self._register_handlers()
+            self._start_message_thread()
             
             # 启动插件
             self.plugin_manager.start_plugins()
@@ -101,6 +120,9 @@ class WeChatBot:
             # 停止插件
             self.plugin_manager.stop_plugins()
             
+            # 停止消息处理线程
+            self._stop_message_thread()
+            
             # 退出微信
             itchat.logout()
             
@@ -116,12 +138,12 @@ class WeChatBot:
         @itchat.msg_register([TEXT])
         def handle_text_message(msg):
             """处理文本消息"""
-            return self.message_handler.handle_text_message(msg)
+            self._msg_queue.put_nowait((self.message_handler.handle_text_message, msg))
         
         @itchat.msg_register([PICTURE, RECORDING, ATTACHMENT, VIDEO])
         def handle_file_message(msg):
             """处理文件消息"""
-            return self.message_handler.handle_file_message(msg)
+            self._msg_queue.put_nowait((self.message_handler.handle_file_message, msg))
         
         @itchat.msg_register(FRIENDS)
         def handle_friend_request(msg):
@@ -130,6 +152,43 @@ class WeChatBot:
         
         logger.info("消息处理器注册完成")
     
+    def _start_message_thread(self):
+        """启动消息处理线程"""
+        if self._msg_thread is None or not self._msg_thread.is_alive():
+            self._msg_thread = threading.Thread(target=self._process_messages, daemon=True)
+            self._msg_thread.start()
+            logger.info("消息处理线程已启动")
+    
+    def _stop_message_thread(self):
+        """停止消息处理线程"""
+        if self._msg_thread and self._msg_thread.is_alive():
+            # None 作为结束标记，排在其之前的消息仍会被处理
+            self._msg_queue.put_nowait(None)
+            self._msg_thread.join(timeout=5)
+        logger.info("消息处理线程已停止")
+    
+    def _process_messages(self):
+        """消息处理循环: 队列为空时阻塞等待，有消息时一次取出一批处理"""
+        while True:
+            batch = [self._msg_queue.get()]
+            try:
+                while len(batch) < MESSAGE_BATCH_SIZE:
+                    batch.append(self._msg_queue.get_nowait())
+            except queue.Empty:
+                pass
+            
+            for item in batch:
+                if item is None:
+                    return
+                
+                handler, msg = item
+                try:
+                    reply = handler(msg)
+                    if reply:
+                        itchat.send(reply, toUserName=msg['FromUserName'])
+                except Exception as e:
+                    logger.error(f"处理消息失败: {e}")
+    
     def reload_plugins(self):
         """重新加载插件"""
         self.plugin_manager.reload_plugins()
@@ -4,11 +4,120 @@
 """
 
 import os
+import json
 import yaml
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
 from pathlib import Path
 from loguru import logger
 
+# 优先使用 libyaml 提供的 C 实现，未安装时回退到纯 Python 实现
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
+
+# 缓存中表示“配置项不存在”的哨兵值
+_MISSING = object()
+
+# 已解析配置文件的 LRU 缓存: 绝对路径 -> (mtime_ns, size, 配置)
+_YAML_CACHE: "OrderedDict[str, Tuple[int, int, Any]]" = OrderedDict()
+_YAML_CACHE_SIZE = 100
+
+# 取值时可以继续向下查找的映射类型：实例自有的 dict 和共享缓存中冻结后的只读视图
+_MAPPINGS = (dict, MappingProxyType)
+
+# 冻结后的容器类型，get() 返回前需要转换回 dict/list
+_FROZEN = (MappingProxyType, tuple)
+
+# 点号路径 -> 专门生成的取值函数，与具体配置内容无关，可在实例间共享
+_ACCESSORS: Dict[str, Callable[[Any], Any]] = {}
+
+
+def _compile_accessor(key: str) -> Callable[[Any], Any]:
+    """为点号路径生成展开后的取值函数，省去 split 和循环"""
+    lines = ["def accessor(value):"]
+    for k in key.split('.'):
+        lines.append("    if not isinstance(value, _MAPPINGS): return _MISSING")
+        lines.append(f"    value = value.get({k!r}, _MISSING)")
+    lines.append("    return value")
+    
+    namespace = {"_MISSING": _MISSING, "_MAPPINGS": _MAPPINGS}
+    exec("\n".join(lines), namespace)
+    accessor = _ACCESSORS[key] = namespace["accessor"]
+    return accessor
+
+
+def _freeze(value: Any) -> Any:
+    """递归冻结配置数据：dict 转为只读视图，list 转为 tuple，使共享的数据无法被修改"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """_freeze 的逆操作，生成一份可以自由修改的副本"""
+    if isinstance(value, _MAPPINGS):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_thaw(v) for v in value]
+    return value
+
+
+def _load_yaml_file(path: str, mtime_ns: int, size: int) -> Any:
+    """解析 YAML 文件，优先读取由同一版本 YAML 生成的 .json 旁路缓存"""
+    sidecar = path + '.json'
+    # 旁路缓存记录生成它时 YAML 的 mtime_ns 和大小，必须完全一致才使用；
+    # 只比较新旧会漏掉 cp -p、tar、git checkout 等恢复出较旧 mtime 的修改
+    try:
+        with open(sidecar, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached["mtime_ns"] == mtime_ns and cached["size"] == size:
+            return cached["config"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        config = yaml.load(f, Loader=SafeLoader)
+    
+    # 只有能原样往返 JSON 的配置才写旁路缓存（日期、非字符串键等会被改写）
+    try:
+        if json.loads(json.dumps(config)) == config:
+            # 临时文件名带进程号，多个进程（如 pytest-xdist 的 worker）同时写入时互不干扰
+            tmp_path = f"{sidecar}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"mtime_ns": mtime_ns, "size": size, "config": config},
+                          f, ensure_ascii=False)
+            os.replace(tmp_path, sidecar)
+    except (OSError, TypeError, ValueError) as e:
+        logger.debug(f"写入配置缓存失败: {e}")
+    
+    return config
+
+
+def _load_yaml_cached(path: str) -> Any:
+    """读取 YAML 文件，文件未变化时直接使用已解析的缓存；返回的数据是共享的，已递归冻结"""
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    
+    cached = _YAML_CACHE.get(path)
+    if cached is not None and cached[:2] == key:
+        _YAML_CACHE.move_to_end(path)
+        config = cached[2]
+    else:
+        config = _freeze(_load_yaml_file(path, *key))
+        _YAML_CACHE[path] = (*key, config)
+        _YAML_CACHE.move_to_end(path)
+        if len(_YAML_CACHE) > _YAML_CACHE_SIZE:
+            _YAML_CACHE.popitem(last=False)
+    
+    return config
+
 
 class ConfigManager:
     """配置管理器"""
@@ -16,24 +125,38 @@ class ConfigManager:
     def __init__(self, config_path: str):
         """初始化配置管理器"""
         self.config_path = config_path
-        self.config = self._load_config()
+        # 点号路径 -> 解析结果的缓存，set()/reload() 时失效
+        self._get_cache: Dict[str, Any] = {}
+        # 是否有尚未保存的修改
+        self._dirty = False
+        self._use_data(self._load_config())
+    
+    def _use_data(self, data: Mapping[str, Any], owned: bool = False) -> None:
+        """切换当前配置数据，owned 为 False 表示数据已冻结，可能与其他实例共享"""
+        self._data = data
+        self._owns_data = owned
+        # 对外只暴露只读视图，需要普通 dict/list 时请使用 get() 或 get_all()
+        self.config: Mapping[str, Any] = MappingProxyType(data)
+        self._get_cache.clear()
     
-    def _load_config(self) -> Dict[str, Any]:
-        """加载配置文件"""
+    def _load_config(self) -> Mapping[str, Any]:
+        """加载配置文件，返回冻结后的数据"""
         try:
             if not os.path.exists(self.config_path):
                 logger.warning(f"配置文件 {self.config_path} 不存在，使用默认配置")
-                return self._get_default_config()
+                return _freeze(self._get_default_config())
             
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+            config = _load_yaml_cached(self.config_path)
+            if config is None:
+                # 空的配置文件解析为 None，按空配置处理
+                config = _freeze({})
             
             logger.info(f"配置文件加载成功: {self.config_path}")
             return config
             
         except Exception as e:
             logger.error(f"加载配置文件失败: {e}")
-            return self._get_default_config()
+            return _freeze(self._get_default_config())
     
     def _get_default_config(self) -> Dict[str, Any]:
         """获取默认配置"""
@@ -47,6 +170,7 @@ class ConfigManager:
                 "upload_dir": "uploads",
                 "output_dir": "outputs",
                 "max_file_size": 50,
+                "max_workers": 4,
                 "supported_formats": {
                     "word": [".doc", ".docx"],
                     "pdf": [".pdf"],
@@ -64,7 +188,8 @@ class ConfigManager:
                     "https://www.10jqka.com.cn/"
                 ],
                 "keywords": ["金融", "股市", "基金", "理财", "投资"],
-                "max_news_count": 5
+                "max_news_count": 5,
+                "subscribers_file": "data/news_subscribers.json"
             },
             "logging": {
                 "level": "INFO",
@@ -76,26 +201,37 @@ class ConfigManager:
             },
             "plugins": {
                 "enabled": ["file_converter", "scheduler", "news_pusher", "help"],
+                "preload": ["scheduler", "news_pusher"],
                 "auto_reload": True
             }
         }
     
     def get(self, key: str, default: Any = None) -> Any:
-        """获取配置值，支持点号分隔的键路径"""
-        keys = key.split('.')
-        value = self.config
-        
+        """获取配置值，支持点号分隔的键路径；列表和字典返回普通的可修改副本"""
         try:
-            for k in keys:
-                value = value[k]
-            return value
-        except (KeyError, TypeError):
+            value = self._get_cache[key]
+        except KeyError:
+            value = self._get_cache[key] = self._resolve(key)
+        if value is _MISSING:
             return default
+        if not self._owns_data and isinstance(value, _FROZEN):
+            # 共享缓存中的数据已冻结，交给调用方的是副本，修改不会影响其他实例
+            return _thaw(value)
+        return value
+    
+    def _resolve(self, key: str) -> Any:
+        """按点号路径逐级查找配置值，不存在时返回 _MISSING"""
+        accessor = _ACCESSORS.get(key) or _compile_accessor(key)
+        return accessor(self._data)
     
     def set(self, key: str, value: Any) -> None:
         """设置配置值"""
+        if not self._owns_data:
+            # 写时复制：首次修改前复制一份，避免影响共享同一份缓存的其他实例
+            self._use_data(_thaw(self._data), owned=True)
+        
         keys = key.split('.')
-        config = self.config
+        config = self._data
         
         # 遍历到最后一个键的父级
         for k in keys[:-1]:
@@ -105,15 +241,25 @@ class ConfigManager:
         
         # 设置最后一个键的值
         config[keys[-1]] = value
+        self._get_cache.clear()
+        self._dirty = True
     
     def save(self) -> None:
-        """保存配置到文件"""
+        """保存配置到文件，配置未修改且文件已存在时跳过"""
+        if not self._dirty and os.path.exists(self.config_path):
+            return
+        
         try:
             # 确保目录存在
-            os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
+            os.makedirs(os.path.dirname(self.config_path) or '.', exist_ok=True)
             
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                yaml.dump(self.config, f, default_flow_style=False, allow_unicode=True)
+            # 先写临时文件再替换，避免写入中途崩溃损坏配置文件
+            tmp_path = self.config_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                yaml.dump(_thaw(self._data), f, Dumper=SafeDumper,
+                          default_flow_style=False, allow_unicode=True)
+            os.replace(tmp_path, self.config_path)
+            self._dirty = False
             
             logger.info(f"配置已保存到: {self.config_path}")
             
@@ -122,12 +268,13 @@ class ConfigManager:
     
     def reload(self) -> None:
         """重新加载配置"""
-        self.config = self._load_config()
+        self._use_data(self._load_config())
+        self._dirty = False
         logger.info("配置重新加载完成")
     
     def get_all(self) -> Dict[str, Any]:
-        """获取所有配置"""
-        return self.config.copy()
+        """获取所有配置的副本，调用方可以随意修改"""
+        return _thaw(self._data)
     
     def validate(self) -> bool:
         """验证配置的有效性"""
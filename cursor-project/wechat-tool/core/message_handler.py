@@ -5,6 +5,8 @@
 
 import re
 import os
+import sys
+import random
 from typing import Dict, Any, Optional
 from pathlib import Path
 from loguru import logger
@@ -12,17 +14,51 @@ from loguru import logger
 import itchat
 
 
+# 非命令消息的默认回复
+_DEFAULT_RESPONSES = (
+    "有什么可以帮助您的吗？",
+    "请发送文件或输入命令，我会为您处理！",
+    "输入 '帮助' 查看所有可用功能。",
+    "我是您的智能助手，随时为您服务！"
+)
+
+
 class MessageHandler:
     """消息处理器"""
     
     def __init__(self, config_manager):
         """初始化消息处理器"""
         self.config = config_manager
-        self.command_patterns = {
-            r'^帮助$|^help$': self._handle_help,
-            r'^状态$|^status$': self._handle_status,
-            r'^插件$|^plugins$': self._handle_plugins,
-            r'^重载$|^reload$': self._handle_reload,
+        # 插件管理器由 WeChatBot 注入
+        self.plugin_manager = None
+        # 系统命令别名表: 分组名 -> (别名, ...)
+        self.command_aliases = {
+            'help': ('帮助', 'help'),
+            'status': ('状态', 'status'),
+            'plugins': ('插件', 'plugins'),
+            'reload': ('重载', 'reload'),
+        }
+        # 合并为一个带命名分组的正则，一次匹配即可确定命令
+        self._cmd_re = re.compile(
+            '^(?:' + '|'.join(
+                f"(?P<{name}>{'|'.join(map(re.escape, aliases))})"
+                for name, aliases in self.command_aliases.items()
+            ) + ')$',
+            re.IGNORECASE
+        )
+        # 预先绑定 match 方法，热路径上省去一次属性解析
+        self._cmd_match = self._cmd_re.match
+        # 命令首字符集合，用于快速排除普通聊天消息
+        self._cmd_first_chars = frozenset(
+            alias[0].lower()
+            for aliases in self.command_aliases.values()
+            for alias in aliases
+        )
+        self._cmd_dispatch = {
+            'help': self._handle_help,
+            'status': self._handle_status,
+            'plugins': self._handle_plugins,
+            'reload': self._handle_reload,
         }
     
     def handle_text_message(self, msg) -> str:
@@ -31,12 +67,17 @@ class MessageHandler:
             user_id = msg['FromUserName']
             content = msg['Text'].strip()
             
-            logger.info(f"收到文本消息: {content} (来自: {user_id})")
+            logger.info("收到文本消息: {} (来自: {})", content, user_id)
+            
+            # 既不是系统命令也不是插件命令时，跳过所有匹配直接回复
+            if (content[:1].lower() not in self._cmd_first_chars and
+                    not content.startswith('/')):
+                return self._get_default_response()
             
             # 检查是否是命令
-            for pattern, handler in self.command_patterns.items():
-                if re.match(pattern, content, re.IGNORECASE):
-                    return handler(msg)
+            match = self._cmd_match(content)
+            if match:
+                return self._cmd_dispatch[match.lastgroup](msg)
             
             # 检查是否是插件命令
             plugin_response = self._handle_plugin_command(content, user_id)
@@ -57,7 +98,7 @@ class MessageHandler:
             file_name = msg['FileName']
             file_path = msg['Text']
             
-            logger.info(f"收到文件: {file_name} (来自: {user_id})")
+            logger.info("收到文件: {} (来自: {})", file_name, user_id)
             
             # 获取文件转换插件
             file_converter = self._get_plugin('file_converter')
@@ -76,7 +117,7 @@ class MessageHandler:
             user_id = msg['RecommendInfo']['UserName']
             user_name = msg['RecommendInfo']['NickName']
             
-            logger.info(f"收到好友请求: {user_name} ({user_id})")
+            logger.info("收到好友请求: {} ({})", user_name, user_id)
             
             # 自动接受好友请求
             itchat.add_friend(**msg['Text'])
@@ -92,11 +133,11 @@ class MessageHandler:
         """执行命令"""
         try:
             # 检查是否是系统命令
-            for pattern, handler in self.command_patterns.items():
-                if re.match(pattern, command, re.IGNORECASE):
-                    # 创建模拟消息对象
-                    mock_msg = {'FromUserName': user_id, 'Text': command}
-                    return handler(mock_msg)
+            match = self._cmd_match(command)
+            if match:
+                # 创建模拟消息对象
+                mock_msg = {'FromUserName': user_id, 'Text': command}
+                return self._cmd_dispatch[match.lastgroup](mock_msg)
             
             # 检查是否是插件命令
             plugin_response = self._handle_plugin_command(command, user_id)
@@ -203,19 +244,19 @@ class MessageHandler:
         """处理插件命令"""
         try:
             # 解析命令格式: /插件名 命令 [参数]
-            if content.startswith('/'):
-                parts = content[1:].split(' ', 1)
-                if len(parts) >= 1:
-                    plugin_name = parts[0]
-                    command = parts[1] if len(parts) > 1 else ""
-                    
-                    plugin_manager = self._get_plugin_manager()
-                    if plugin_manager:
-                        plugin = plugin_manager.get_plugin(plugin_name)
-                        if plugin:
-                            return plugin.execute_command(command, user_id=user_id)
-                        else:
-                            return f"插件 '{plugin_name}' 不存在或未加载。"
+            if not content.startswith('/'):
+                return None
+            
+            plugin_name, _, command = content[1:].partition(' ')
+            plugin_name = sys.intern(plugin_name)
+            
+            plugin_manager = self.plugin_manager
+            if plugin_manager:
+                plugin = plugin_manager.get_plugin(plugin_name)
+                if plugin:
+                    return plugin.execute_command(command, user_id=user_id)
+                else:
+                    return f"插件 '{plugin_name}' 不存在或未加载。"
             
             return None
             
@@ -236,7 +277,7 @@ class MessageHandler:
     
     def _get_plugin_manager(self):
         """获取插件管理器"""
-        return getattr(self, 'plugin_manager', None)
+        return self.plugin_manager
     
     def _is_bot_running(self) -> bool:
         """检查机器人是否正在运行"""
@@ -245,11 +286,4 @@ class MessageHandler:
     
     def _get_default_response(self) -> str:
         """获取默认回复"""
-        responses = [
-            "有什么可以帮助您的吗？",
-            "请发送文件或输入命令，我会为您处理！",
-            "输入 '帮助' 查看所有可用功能。",
-            "我是您的智能助手，随时为您服务！"
-        ]
-        import random
-        return random.choice(responses) 
\ No newline at end of file
+        return random.choice(_DEFAULT_RESPONSES) 
\ No newline at end of file
@@ -6,8 +6,9 @@
 import os
 import sys
 import importlib
-import inspect
-from typing import Dict, List, Any, Optional, Type
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple, Type
 from pathlib import Path
 from loguru import logger
 
@@ -23,15 +24,29 @@ class PluginManager:
         self.plugins: Dict[str, BasePlugin] = {}
         self.plugin_modules: Dict[str, Any] = {}
         self.plugins_dir = "plugins"
+        # 插件所在的包名，插件模块以 plugins.<插件名> 导入
+        self.plugins_package = "plugins"
+        # 已卸载、下次加载时需要 reload 以读取最新代码的插件
+        self._stale_modules: set = set()
+        self.is_started = False
+        # 插件元数据按列存储，仅在加载/卸载时更新，供 get_status 直接组装
+        self._keys: List[str] = []
+        self._names: List[str] = []
+        self._versions: List[str] = []
+        self._descriptions: List[str] = []
+        # get_status 的结果快照: (启用列表, 各插件运行状态) -> 状态字典
+        self._status_cache: Optional[Tuple[Tuple, Dict[str, Any]]] = None
+        # 保护 plugins 与元数据列的同步更新，get_status 在锁内读取，不会看到卸载到一半的插件
+        self._registry_lock = threading.Lock()
+        # 按插件名划分的加载锁，避免并发首次访问时重复加载
+        self._load_locks: Dict[str, threading.Lock] = {}
         
         # 确保插件目录存在
         Path(self.plugins_dir).mkdir(exist_ok=True)
     
     def load_plugins(self) -> None:
-        """加载所有启用的插件"""
-        enabled_plugins = self.config.get("plugins.enabled", [])
-        
-        for plugin_name in enabled_plugins:
+        """加载需要预加载的插件，其余启用的插件在首次使用时再加载"""
+        for plugin_name in self._get_preload_plugins():
             try:
                 self.load_plugin(plugin_name)
             except Exception as e:
@@ -39,6 +54,8 @@ class PluginManager:
     
     def load_plugin(self, plugin_name: str) -> Optional[BasePlugin]:
         """加载单个插件"""
+        # 驻留插件名，使查找时的字符串比较可以走同一对象的快速路径
+        plugin_name = sys.intern(plugin_name)
         try:
             # 构建插件模块路径
             plugin_path = os.path.join(self.plugins_dir, f"{plugin_name}.py")
@@ -47,19 +64,24 @@ class PluginManager:
                 logger.warning(f"插件文件不存在: {plugin_path}")
                 return None
             
-            # 动态导入插件模块
-            spec = importlib.util.spec_from_file_location(plugin_name, plugin_path)
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+            # 通过标准导入机制加载，复用 sys.modules 和 __pycache__ 中的字节码
+            module_name = f"{self.plugins_package}.{plugin_name}"
+            module = sys.modules.get(module_name)
+            if module is not None and plugin_name in self._stale_modules:
+                module = importlib.reload(module)
+            elif module is None:
+                module = importlib.import_module(module_name)
+            self._stale_modules.discard(plugin_name)
             
-            # 查找插件类
-            plugin_class = None
-            for name, obj in inspect.getmembers(module):
-                if (inspect.isclass(obj) and 
-                    issubclass(obj, BasePlugin) and 
-                    obj != BasePlugin):
-                    plugin_class = obj
-                    break
+            # 查找插件类: 优先使用模块声明的 PLUGIN_CLASS，否则扫描模块命名空间
+            plugin_class = getattr(module, 'PLUGIN_CLASS', None)
+            if plugin_class is None:
+                for obj in vars(module).values():
+                    if (isinstance(obj, type) and
+                        obj is not BasePlugin and
+                        issubclass(obj, BasePlugin)):
+                        plugin_class = obj
+                        break
             
             if plugin_class is None:
                 logger.error(f"在插件 {plugin_name} 中未找到有效的插件类")
@@ -69,8 +91,10 @@ class PluginManager:
             plugin_instance = plugin_class(self.config)
             
             # 注册插件
-            self.plugins[plugin_name] = plugin_instance
-            self.plugin_modules[plugin_name] = module
+            with self._registry_lock:
+                self.plugins[plugin_name] = plugin_instance
+                self.plugin_modules[plugin_name] = module
+                self._register_metadata(plugin_name, plugin_instance)
             
             logger.info(f"插件 {plugin_name} 加载成功")
             return plugin_instance
@@ -79,16 +103,42 @@ class PluginManager:
             logger.error(f"加载插件 {plugin_name} 失败: {e}")
             return None
     
+    def _register_metadata(self, plugin_name: str, plugin: BasePlugin) -> None:
+        """记录插件元数据，重复加载时原位更新"""
+        self._status_cache = None
+        if plugin_name in self._keys:
+            index = self._keys.index(plugin_name)
+            self._names[index] = plugin.name
+            self._versions[index] = plugin.version
+            self._descriptions[index] = plugin.description
+        else:
+            self._keys.append(plugin_name)
+            self._names.append(plugin.name)
+            self._versions.append(plugin.version)
+            self._descriptions.append(plugin.description)
+    
+    def _unregister_metadata(self, plugin_name: str) -> None:
+        """移除插件元数据"""
+        self._status_cache = None
+        index = self._keys.index(plugin_name)
+        del self._keys[index]
+        del self._names[index]
+        del self._versions[index]
+        del self._descriptions[index]
+    
     def unload_plugin(self, plugin_name: str) -> bool:
         """卸载插件"""
         try:
             if plugin_name in self.plugins:
                 plugin = self.plugins[plugin_name]
                 plugin.stop()
-                del self.plugins[plugin_name]
+                with self._registry_lock:
+                    del self.plugins[plugin_name]
+                    self._unregister_metadata(plugin_name)
                 
                 if plugin_name in self.plugin_modules:
                     del self.plugin_modules[plugin_name]
+                self._stale_modules.add(plugin_name)
                 
                 logger.info(f"插件 {plugin_name} 卸载成功")
                 return True
@@ -117,63 +167,124 @@ class PluginManager:
         """重新加载所有插件"""
         logger.info("开始重新加载所有插件...")
         
-        # 获取当前启用的插件列表
-        enabled_plugins = self.config.get("plugins.enabled", [])
-        
         # 卸载所有插件
         for plugin_name in list(self.plugins.keys()):
             self.unload_plugin(plugin_name)
         
-        # 重新加载启用的插件
-        for plugin_name in enabled_plugins:
-            self.load_plugin(plugin_name)
+        # 重新加载预加载插件，其余插件在首次使用时加载
+        self.load_plugins()
+        if self.is_started:
+            self.start_plugins()
         
         logger.info("插件重新加载完成")
     
     def start_plugins(self) -> None:
         """启动所有插件"""
-        for plugin_name, plugin in self.plugins.items():
-            try:
-                plugin.start()
-                logger.info(f"插件 {plugin_name} 启动成功")
-            except Exception as e:
-                logger.error(f"启动插件 {plugin_name} 失败: {e}")
+        self.is_started = True
+        self._run_concurrently("start", "启动")
     
     def stop_plugins(self) -> None:
         """停止所有插件"""
-        for plugin_name, plugin in self.plugins.items():
-            try:
-                plugin.stop()
-                logger.info(f"插件 {plugin_name} 停止成功")
-            except Exception as e:
-                logger.error(f"停止插件 {plugin_name} 失败: {e}")
+        self.is_started = False
+        self._run_concurrently("stop", "停止")
+    
+    def _run_concurrently(self, method: str, action: str) -> None:
+        """在线程池中并发调用所有插件的生命周期方法，总耗时取决于最慢的插件"""
+        plugins = list(self.plugins.items())
+        if not plugins:
+            return
+        
+        with ThreadPoolExecutor(max_workers=len(plugins)) as executor:
+            futures = {
+                plugin_name: executor.submit(getattr(plugin, method))
+                for plugin_name, plugin in plugins
+            }
+        
+        for plugin_name, future in futures.items():
+            error = future.exception()
+            if error is None:
+                logger.info(f"插件 {plugin_name} {action}成功")
+            else:
+                logger.error(f"{action}插件 {plugin_name} 失败: {error}")
     
     def get_plugin(self, plugin_name: str) -> Optional[BasePlugin]:
-        """获取插件实例"""
-        return self.plugins.get(plugin_name)
+        """获取插件实例，启用但尚未加载的插件会在此时加载"""
+        plugin = self.plugins.get(plugin_name)
+        if plugin is None and plugin_name in self.config.get("plugins.enabled", []):
+            plugin = self._load_on_demand(plugin_name)
+        return plugin
+    
+    def _load_on_demand(self, plugin_name: str) -> Optional[BasePlugin]:
+        """首次使用时加载插件，插件系统已启动时同时启动该插件"""
+        lock = self._load_locks.setdefault(plugin_name, threading.Lock())
+        with lock:
+            # 等待锁期间可能已被其他线程加载
+            plugin = self.plugins.get(plugin_name)
+            if plugin is not None:
+                return plugin
+            
+            plugin = self.load_plugin(plugin_name)
+            if plugin is not None and self.is_started:
+                try:
+                    plugin.start()
+                    logger.info(f"插件 {plugin_name} 启动成功")
+                except Exception as e:
+                    logger.error(f"启动插件 {plugin_name} 失败: {e}")
+            return plugin
+    
+    def _get_preload_plugins(self) -> List[str]:
+        """获取需要预加载的插件，未配置时预加载所有启用的插件"""
+        enabled_plugins = self.config.get("plugins.enabled", [])
+        preload_plugins = self.config.get("plugins.preload")
+        if preload_plugins is None:
+            return list(enabled_plugins)
+        return [name for name in preload_plugins if name in enabled_plugins]
     
     def get_all_plugins(self) -> Dict[str, BasePlugin]:
         """获取所有插件"""
         return self.plugins.copy()
     
     def get_status(self) -> Dict[str, Any]:
-        """获取插件状态"""
-        status = {
-            "total_plugins": len(self.plugins),
-            "enabled_plugins": self.config.get("plugins.enabled", []),
-            "loaded_plugins": list(self.plugins.keys()),
-            "plugin_details": {}
-        }
+        """获取插件状态，插件和运行状态都未变化时复用缓存的快照，返回的是副本，调用方可以随意修改"""
+        enabled_plugins = self.config.get("plugins.enabled", [])
+        with self._registry_lock:
+            # 运行状态可能由插件自身改变，始终读取实时值作为快照依据
+            snapshot_key = (
+                tuple(enabled_plugins),
+                tuple(self.plugins[key].is_running for key in self._keys),
+            )
+            cached = self._status_cache
+            if cached is not None and cached[0] == snapshot_key:
+                status = cached[1]
+            else:
+                status = {
+                    "total_plugins": len(self._keys),
+                    "enabled_plugins": list(enabled_plugins),
+                    "loaded_plugins": list(self._keys),
+                    "plugin_details": {
+                        key: {
+                            "name": name,
+                            "version": version,
+                            "description": description,
+                            "is_running": is_running
+                        }
+                        for key, name, version, description, is_running in zip(
+                            self._keys, self._names, self._versions, self._descriptions,
+                            snapshot_key[1]
+                        )
+                    }
+                }
+                self._status_cache = (snapshot_key, status)
         
-        for name, plugin in self.plugins.items():
-            status["plugin_details"][name] = {
-                "name": plugin.name,
-                "version": plugin.version,
-                "description": plugin.description,
-                "is_running": plugin.is_running
+        # 缓存的快照在多次调用间共享，只交出副本，避免调用方的修改污染缓存
+        return {
+            "total_plugins": status["total_plugins"],
+            "enabled_plugins": list(status["enabled_plugins"]),
+            "loaded_plugins": list(status["loaded_plugins"]),
+            "plugin_details": {
+                key: dict(details) for key, details in status["plugin_details"].items()
             }
-        
-        return status
+        }
     
     def execute_plugin_command(self, plugin_name: str, command: str, **kwargs) -> Any:
         """执行插件命令"""
@@ -11,6 +11,10 @@ from pathlib import Path
 from loguru import logger
 
 
+# 本进程中已创建过的目录，重复调用时跳过 mkdir
+_CREATED_DIRS = set()
+
+
 def check_python_version():
     """检查Python版本"""
     if sys.version_info < (3, 8):
@@ -25,13 +29,11 @@ def install_dependencies():
     print("📦 安装依赖包...")
     
     try:
-        # 升级pip
-        subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade", "pip"], 
-                      check=True, capture_output=True)
-        
-        # 安装依赖
-        subprocess.run([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"], 
-                      check=True, capture_output=True)
+        # 一次调用同时升级pip并安装依赖，输出直接显示在终端
+        subprocess.run([sys.executable, "-m", "pip", "install", "--upgrade",
+                        "--disable-pip-version-check",
+                        "-r", "requirements.txt", "pip"],
+                       check=True)
         
         print("✅ 依赖包安装完成")
         return True
@@ -54,7 +56,10 @@ def create_directories():
     ]
     
     for directory in directories:
-        Path(directory).mkdir(exist_ok=True)
+        if directory in _CREATED_DIRS:
+            continue
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        _CREATED_DIRS.add(directory)
         print(f"  ✅ 创建目录: {directory}")
     
     print("✅ 目录结构创建完成")
@@ -85,7 +90,8 @@ def run_tests():
             print("✅ 测试通过")
             return True
         else:
-            print(f"❌ 测试失败: {result.stderr}")
+            # pytest 把失败详情输出到 stdout
+            print(f"❌ 测试失败: {result.stdout or result.stderr}")
             return False
             
     except Exception as e:
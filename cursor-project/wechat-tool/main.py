@@ -18,21 +18,6 @@ from core.bot import WeChatBot
 from loguru import logger
 
 
-def signal_handler(signum, frame):
-    """信号处理器"""
-    logger.info(f"收到信号 {signum}，正在优雅关闭...")
-    if hasattr(signal_handler, 'bot'):
-        signal_handler.bot.stop()
-    sys.exit(0)
-
-
-def setup_signal_handlers(bot):
-    """设置信号处理器"""
-    signal_handler.bot = bot
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-
-
 def parse_arguments():
     """解析命令行参数"""
     parser = argparse.ArgumentParser(description='微信工具机器人')
@@ -67,9 +52,8 @@ def main():
             logger.add(sys.stderr, level="DEBUG")
             logger.add("logs/debug.log", level="DEBUG", rotation="1 day")
         
-        logger.info("=" * 50)
-        logger.info("🤖 微信工具机器人启动中...")
-        logger.info("=" * 50)
+        banner = "=" * 50
+        logger.info("\n".join([banner, "🤖 微信工具机器人启动中...", banner]))
         
         # 检查配置文件
         config_path = args.config
@@ -79,31 +63,38 @@ def main():
         # 创建机器人实例
         bot = WeChatBot(config_path)
         
-        # 设置信号处理器
-        setup_signal_handlers(bot)
+        # 设置信号处理器，通过闭包直接引用 bot
+        def handle_signal(signum, frame):
+            logger.info(f"收到信号 {signum}，正在优雅关闭...")
+            bot.stop()
+            sys.exit(0)
+        
+        signal.signal(signal.SIGINT, handle_signal)
+        signal.signal(signal.SIGTERM, handle_signal)
         
         # 验证配置
         if not bot.config.validate():
             logger.error("配置验证失败，请检查配置文件")
             return 1
         
-        # 显示启动信息
-        logger.info("📋 机器人配置信息:")
-        logger.info(f"  配置文件: {config_path}")
-        logger.info(f"  日志级别: {args.log_level}")
-        logger.info(f"  调试模式: {'是' if args.debug else '否'}")
-        
-        # 显示插件信息
-        plugin_status = bot.get_plugin_status()
-        logger.info(f"📦 已启用插件: {len(plugin_status.get('loaded_plugins', []))}")
-        for plugin_name in plugin_status.get('loaded_plugins', []):
-            logger.info(f"  - {plugin_name}")
-        
-        logger.info("=" * 50)
-        logger.info("🚀 启动微信机器人...")
-        logger.info("📱 请使用微信扫描二维码登录")
-        logger.info("💡 输入 'help' 查看帮助信息")
-        logger.info("=" * 50)
+        # 显示启动信息，合并为一条日志记录
+        loaded_plugins = bot.get_plugin_status().get('loaded_plugins', [])
+        lines = [
+            "📋 机器人配置信息:",
+            f"  配置文件: {config_path}",
+            f"  日志级别: {args.log_level}",
+            f"  调试模式: {'是' if args.debug else '否'}",
+            f"📦 已启用插件: {len(loaded_plugins)}",
+        ]
+        lines.extend(f"  - {plugin_name}" for plugin_name in loaded_plugins)
+        lines.extend([
+            banner,
+            "🚀 启动微信机器人...",
+            "📱 请使用微信扫描二维码登录",
+            "💡 输入 'help' 查看帮助信息",
+            banner,
+        ])
+        logger.info("\n".join(lines))
         
         # 启动机器人
         bot.start()
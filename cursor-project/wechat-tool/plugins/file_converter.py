@@ -4,23 +4,37 @@
 """
 
 import os
+import queue
 import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from xml.sax.saxutils import escape
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 from loguru import logger
 
 import itchat
-from docx import Document
-from docx2txt import process
-import PyPDF2
-from PIL import Image
-import img2pdf
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
+# 各转换库较重，在对应的 _convert_* 方法内按需导入，不拖慢机器人启动
 
 from core.base_plugin import BasePlugin
 
 
+# 扩展名查找缓存的最大条目数
+_EXT_CACHE_SIZE = 128
+
+# 文件类型 -> 转换后输出文件的扩展名
+_OUTPUT_SUFFIX = {"word": ".pdf", "image": ".pdf", "pdf": ".docx"}
+
+
+@lru_cache(maxsize=None)
+def _pdf_body_style():
+    """Word转PDF使用的正文段落样式，样式表构建开销不小，首次调用时创建后复用"""
+    from reportlab.lib.styles import getSampleStyleSheet
+    return getSampleStyleSheet()["Normal"]
+
+
 class FileConverterPlugin(BasePlugin):
     """文件转换插件"""
     
@@ -34,7 +48,24 @@ class FileConverterPlugin(BasePlugin):
         self.upload_dir = self.config.get("file_processing.upload_dir", "uploads")
         self.output_dir = self.config.get("file_processing.output_dir", "outputs")
         self.max_file_size = self.config.get("file_processing.max_file_size", 50) * 1024 * 1024  # MB to bytes
-        self.supported_formats = self.config.get("file_processing.supported_formats", {})
+        # 每类格式的扩展名集合只构建一次，成员判断为常数时间
+        self.supported_formats = {
+            file_type: frozenset(extensions)
+            for file_type, extensions in self.config.get("file_processing.supported_formats", {}).items()
+        }
+        # 扩展名 -> 文件类型，一次哈希查找即可确定类型
+        self._ext_to_type = {}
+        for file_type, extensions in self.supported_formats.items():
+            for ext in extensions:
+                self._ext_to_type.setdefault(ext.lower(), file_type)
+        # 原始扩展名(未转小写) -> 文件类型，按需填充，命中时省去 lower() 和表查找
+        self._ext_cache: Dict[str, Optional[str]] = {}
+        # 转换线程池，start() 时创建，多个用户的上传可以并行转换
+        self.max_workers = self.config.get("file_processing.max_workers", 4)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # 发送线程：串行上传转换结果并清理临时目录，与下一次转换重叠执行
+        self._send_queue: "queue.Queue" = queue.Queue()
+        self._sender_thread: Optional[threading.Thread] = None
         
         # 确保目录存在
         Path(self.upload_dir).mkdir(exist_ok=True)
@@ -42,50 +73,132 @@ class FileConverterPlugin(BasePlugin):
     
     def start(self) -> None:
         """启动插件"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="file-converter")
+        if self._sender_thread is None:
+            self._sender_thread = threading.Thread(target=self._sender_loop, args=(self._send_queue,),
+                                                   daemon=True)
+            self._sender_thread.start()
         self.is_running = True
         logger.info("文件转换插件已启动")
     
     def stop(self) -> None:
         """停止插件"""
         self.is_running = False
+        # 等待已提交的转换完成，避免发送到一半被中断
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        # 转换全部入队后再结束发送线程，None 之前的文件仍会被发送
+        if self._sender_thread is not None:
+            self._send_queue.put(None)
+            self._sender_thread.join(timeout=30)
+            # 超时后旧线程可能仍在处理自己的队列；下一次启动换用新队列，
+            # 避免两个发送线程消费同一个队列，重复发送或争抢删除临时目录
+            self._send_queue = queue.Queue()
+            self._sender_thread = None
         logger.info("文件转换插件已停止")
     
     def handle_file_upload(self, file_path: str, file_name: str, user_id: str) -> str:
         """处理文件上传"""
         try:
-            logger.info(f"处理文件上传: {file_name}")
+            logger.info("处理文件上传: {}", file_name)
             
-            # 检查文件大小
-            if not self._check_file_size(file_path):
+            # 检查文件大小，只 stat 一次
+            try:
+                file_size = os.stat(file_path).st_size
+            except OSError:
+                file_size = None
+            if file_size is None or file_size > self.max_file_size:
                 return f"文件过大，最大支持 {self.max_file_size // (1024*1024)}MB"
             
-            # 获取文件类型
-            file_type = self._get_file_type(file_name)
+            # 获取文件类型，文件名只解析一次
+            name = Path(file_name)
+            file_type = self._get_file_type(name.suffix)
             if not file_type:
                 return "不支持的文件格式"
             
-            # 根据文件类型进行转换
+            # 输出文件名只计算一次，再传给具体的转换方法；
+            # 配置中可能出现没有对应转换方法的类型，同样视为不支持
+            suffix = _OUTPUT_SUFFIX.get(file_type)
+            if suffix is None:
+                return "不支持的文件格式"
+            output_name = name.stem + suffix
+            
+            # 提交到线程池后立即返回，转换结果稍后单独发送给用户
+            if self._executor is None:
+                return self._convert(file_type, file_path, file_name, output_name, user_id)
+            self._executor.submit(self._convert_and_notify, file_type, file_path, file_name, output_name, user_id)
+            return f"📥 已收到文件 {file_name}，正在转换，请稍候..."
+                
+        except Exception as e:
+            logger.error(f"处理文件上传失败: {e}")
+            return f"文件处理失败: {str(e)}"
+    
+    def _convert(self, file_type: str, file_path: str, file_name: str, output_name: str, user_id: str) -> str:
+        """根据文件类型进行转换"""
+        # 每次转换使用独立的临时目录：保留原文件名发送给用户，
+        # 并发上传同名文件互不覆盖
+        tmp_dir = tempfile.mkdtemp(dir=self.output_dir)
+        try:
+            output_path = os.path.join(tmp_dir, output_name)
             if file_type == "word":
-                return self._convert_word_to_pdf(file_path, file_name, user_id)
+                return self._convert_word_to_pdf(file_path, file_name, output_path, user_id)
             elif file_type == "image":
-                return self._convert_image_to_pdf(file_path, file_name, user_id)
+                return self._convert_image_to_pdf(file_path, file_name, output_path, user_id)
             elif file_type == "pdf":
-                return self._convert_pdf_to_word(file_path, file_name, user_id)
+                return self._convert_pdf_to_word(file_path, file_name, output_path, user_id)
             else:
                 return "不支持的文件格式"
-                
+        finally:
+            # 排在发送任务之后删除临时目录，转换失败时同样会被清理
+            self._enqueue_output(tmp_dir)
+    
+    def _enqueue_output(self, path: str, user_id: Optional[str] = None) -> None:
+        """把待发送的文件(或待删除的临时目录)交给发送线程，插件未启动时直接处理"""
+        if self._sender_thread is None:
+            self._handle_output(path, user_id)
+        else:
+            self._send_queue.put((path, user_id))
+    
+    def _handle_output(self, path: str, user_id: Optional[str]) -> None:
+        """发送文件；user_id 为 None 时表示删除临时目录"""
+        if user_id is None:
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            itchat.send_file(path, toUserName=user_id)
+    
+    def _sender_loop(self, send_queue: "queue.Queue") -> None:
+        """发送线程循环: 按提交顺序发送文件并清理临时目录，只消费启动时分配的队列"""
+        while True:
+            item = send_queue.get()
+            if item is None:
+                return
+            try:
+                self._handle_output(*item)
+            except Exception as e:
+                logger.error(f"发送转换文件失败: {e}")
+    
+    def _convert_and_notify(self, file_type: str, file_path: str, file_name: str,
+                            output_name: str, user_id: str) -> None:
+        """在线程池中执行转换，并把结果消息发送给用户"""
+        # 线程池中的异常不会被任何人取出，必须在这里记录并告知用户
+        try:
+            result = self._convert(file_type, file_path, file_name, output_name, user_id)
         except Exception as e:
-            logger.error(f"处理文件上传失败: {e}")
-            return f"文件处理失败: {str(e)}"
+            logger.error(f"文件转换失败: {e}")
+            result = f"转换失败: {str(e)}"
+        
+        try:
+            itchat.send_msg(result, toUserName=user_id)
+        except Exception as e:
+            logger.error(f"发送转换结果失败: {e}")
     
     def execute_command(self, command: str, **kwargs) -> str:
         """执行插件命令"""
-        if command == "help":
-            return self.get_help()
-        elif command == "status":
-            return self._get_conversion_status()
-        else:
-            return "未知命令，输入 'help' 查看帮助"
+        handler = self._DISPATCH.get(command)
+        return handler(self) if handler else "未知命令，输入 'help' 查看帮助"
     
     def get_help(self) -> str:
         """获取帮助信息"""
@@ -107,85 +220,40 @@ class FileConverterPlugin(BasePlugin):
 • 转换后的文件会自动发送给您
         """
     
-    def _check_file_size(self, file_path: str) -> bool:
-        """检查文件大小"""
+    def _get_file_type(self, ext: str) -> Optional[str]:
+        """根据扩展名获取文件类型"""
         try:
-            file_size = os.path.getsize(file_path)
-            return file_size <= self.max_file_size
-        except Exception:
-            return False
-    
-    def _get_file_type(self, file_name: str) -> Optional[str]:
-        """获取文件类型"""
-        file_ext = Path(file_name).suffix.lower()
-        
-        if file_ext in self.supported_formats.get("word", []):
-            return "word"
-        elif file_ext in self.supported_formats.get("pdf", []):
-            return "pdf"
-        elif file_ext in self.supported_formats.get("image", []):
-            return "image"
-        else:
-            return None
+            return self._ext_cache[ext]
+        except KeyError:
+            file_type = self._ext_to_type.get(ext.lower())
+            if len(self._ext_cache) >= _EXT_CACHE_SIZE:
+                self._ext_cache.clear()
+            self._ext_cache[ext] = file_type
+            return file_type
     
-    def _convert_word_to_pdf(self, file_path: str, file_name: str, user_id: str) -> str:
+    def _convert_word_to_pdf(self, file_path: str, file_name: str, output_path: str, user_id: str) -> str:
         """Word转PDF"""
         try:
             logger.info(f"开始转换Word到PDF: {file_name}")
-            
-            # 读取Word文档
-            doc = Document(file_path)
-            
-            # 创建输出文件名
-            output_name = Path(file_name).stem + ".pdf"
-            output_path = os.path.join(self.output_dir, output_name)
+            from docx2txt import process
+            from reportlab.lib.pagesizes import A4
+            from reportlab.platypus import SimpleDocTemplate, Paragraph
             
             # 提取文本内容
             text_content = process(file_path)
             
-            # 创建PDF
-            c = canvas.Canvas(output_path, pagesize=A4)
-            width, height = A4
-            
-            # 设置字体和大小
-            c.setFont("Helvetica", 12)
-            
-            # 分行处理文本
-            lines = text_content.split('\n')
-            y_position = height - 50
-            
-            for line in lines:
-                if y_position < 50:  # 需要新页面
-                    c.showPage()
-                    c.setFont("Helvetica", 12)
-                    y_position = height - 50
-                
-                # 处理长行
-                if len(line) > 80:
-                    words = line.split()
-                    current_line = ""
-                    for word in words:
-                        if len(current_line + word) < 80:
-                            current_line += word + " "
-                        else:
-                            c.drawString(50, y_position, current_line.strip())
-                            y_position -= 20
-                            current_line = word + " "
-                    
-                    if current_line:
-                        c.drawString(50, y_position, current_line.strip())
-                        y_position -= 20
-                else:
-                    c.drawString(50, y_position, line)
-                    y_position -= 20
+            body_style = _pdf_body_style()
             
-            c.save()
+            # 由 Platypus 负责分行和分页
+            story = [
+                Paragraph(escape(line), body_style)
+                for line in text_content.split('\n')
+                if line.strip()
+            ]
+            SimpleDocTemplate(output_path, pagesize=A4).build(story)
             
-            # 发送转换后的文件
-            itchat.send_file(output_path, toUserName=user_id)
-            
-            # 清理临时文件
-            os.remove(output_path)
+            # 交给发送线程发送转换后的文件
+            self._enqueue_output(output_path, user_id)
             
             return f"✅ Word文档已成功转换为PDF！"
             
@@ -193,24 +261,18 @@ class FileConverterPlugin(BasePlugin):
             logger.error(f"Word转PDF失败: {e}")
             return f"转换失败: {str(e)}"
     
-    def _convert_image_to_pdf(self, file_path: str, file_name: str, user_id: str) -> str:
+    def _convert_image_to_pdf(self, file_path: str, file_name: str, output_path: str, user_id: str) -> str:
         """图片转PDF"""
         try:
             logger.info(f"开始转换图片到PDF: {file_name}")
+            import img2pdf
             
-            # 创建输出文件名
-            output_name = Path(file_name).stem + ".pdf"
-            output_path = os.path.join(self.output_dir, output_name)
-            
-            # 使用img2pdf转换
+            # 使用img2pdf转换，直接写入输出文件而不先生成完整的bytes
             with open(output_path, "wb") as f:
-                f.write(img2pdf.convert(file_path))
-            
-            # 发送转换后的文件
-            itchat.send_file(output_path, toUserName=user_id)
+                img2pdf.convert(file_path, outputstream=f)
             
-            # 清理临时文件
-            os.remove(output_path)
+            # 交给发送线程发送转换后的文件
+            self._enqueue_output(output_path, user_id)
             
             return f"✅ 图片已成功转换为PDF！"
             
@@ -218,41 +280,29 @@ class FileConverterPlugin(BasePlugin):
             logger.error(f"图片转PDF失败: {e}")
             return f"转换失败: {str(e)}"
     
-    def _convert_pdf_to_word(self, file_path: str, file_name: str, user_id: str) -> str:
+    def _convert_pdf_to_word(self, file_path: str, file_name: str, output_path: str, user_id: str) -> str:
         """PDF转Word"""
         try:
             logger.info(f"开始转换PDF到Word: {file_name}")
-            
-            # 读取PDF
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                # 提取文本
-                text_content = ""
-                for page in pdf_reader.pages:
-                    text_content += page.extract_text() + "\n"
+            import fitz
+            from docx import Document
             
             # 创建Word文档
             doc = Document()
             
-            # 添加文本内容
-            paragraphs = text_content.split('\n')
-            for para in paragraphs:
-                if para.strip():
-                    doc.add_paragraph(para.strip())
-            
-            # 创建输出文件名
-            output_name = Path(file_name).stem + ".docx"
-            output_path = os.path.join(self.output_dir, output_name)
+            # 逐页提取文本并写入文档，不在内存中拼接整份PDF的文本
+            with fitz.open(file_path) as pdf:
+                for page in pdf:
+                    for para in page.get_text("text").split('\n'):
+                        para = para.strip()
+                        if para:
+                            doc.add_paragraph(para)
             
             # 保存Word文档
             doc.save(output_path)
             
-            # 发送转换后的文件
-            itchat.send_file(output_path, toUserName=user_id)
-            
-            # 清理临时文件
-            os.remove(output_path)
+            # 交给发送线程发送转换后的文件
+            self._enqueue_output(output_path, user_id)
             
             return f"✅ PDF已成功转换为Word文档！"
             
@@ -274,4 +324,14 @@ class FileConverterPlugin(BasePlugin):
 • Word → PDF: ✅
 • 图片 → PDF: ✅  
 • PDF → Word: ✅
-        """ 
\ No newline at end of file
+        """
+    
+    # 子命令 -> 处理方法，execute_command 一次查表完成分发
+    _DISPATCH = {
+        "help": get_help,
+        "status": _get_conversion_status,
+    }
+
+
+# 供插件管理器直接定位插件类
+PLUGIN_CLASS = FileConverterPlugin
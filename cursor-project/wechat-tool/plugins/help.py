@@ -9,6 +9,149 @@ from loguru import logger
 from core.base_plugin import BasePlugin
 
 
+# 各命令的详细帮助，模块级常量避免每次调用都重建字典
+_COMMAND_HELP = {
+    "help": """
+📖 help 命令帮助
+
+用法: help [子命令]
+
+子命令:
+• help - 显示主帮助信息
+• commands - 显示所有命令
+• plugins - 显示插件信息
+• about - 显示关于信息
+
+示例:
+• help - 显示主帮助
+• help commands - 显示命令列表
+• help plugins - 显示插件信息
+    """,
+    
+    "status": """
+📊 status 命令帮助
+
+用法: status
+
+功能: 查看机器人运行状态
+
+显示信息:
+• 插件运行状态
+• 系统配置状态
+• 数据库连接状态
+• 各插件统计信息
+
+示例:
+• status - 查看系统状态
+    """,
+    
+    "plugins": """
+📦 plugins 命令帮助
+
+用法: plugins
+
+功能: 查看已安装插件
+
+显示信息:
+• 插件列表
+• 插件版本
+• 插件描述
+• 运行状态
+
+示例:
+• plugins - 查看插件列表
+    """,
+    
+    "reload": """
+🔄 reload 命令帮助
+
+用法: reload
+
+功能: 重新加载所有插件
+
+注意事项:
+• 会重新加载所有启用的插件
+• 正在运行的任务会受到影响
+• 建议在维护时使用
+
+示例:
+• reload - 重新加载插件
+    """,
+    
+    "file_converter": """
+📁 file_converter 命令帮助
+
+用法: /file_converter [子命令]
+
+子命令:
+• help - 显示文件转换帮助
+• status - 查看转换状态
+
+支持格式:
+• Word文档 (.doc/.docx) → PDF
+• 图片文件 (.jpg/.png等) → PDF
+• PDF文件 → Word文档
+
+使用方法:
+• 直接发送文件即可自动转换
+• 转换后的文件会自动发送给您
+
+示例:
+• /file_converter help - 查看帮助
+• /file_converter status - 查看状态
+    """,
+    
+    "scheduler": """
+⏰ scheduler 命令帮助
+
+用法: /scheduler [子命令] [参数]
+
+子命令:
+• add - 添加定时任务
+• list - 查看所有任务
+• delete - 删除指定任务
+• help - 显示帮助
+• status - 查看状态
+
+时间格式:
+• daily HH:MM - 每日执行
+• weekly 0-6 HH:MM - 每周指定天执行
+• once YYYY-MM-DD HH:MM - 一次性执行
+
+示例:
+• /scheduler add daily 09:00 早安提醒
+• /scheduler add weekly 1 18:00 周会提醒
+• /scheduler add once 2024-01-01 10:00 新年快乐
+• /scheduler list - 查看所有任务
+• /scheduler delete 1 - 删除任务ID为1的任务
+    """,
+    
+    "news_pusher": """
+📰 news_pusher 命令帮助
+
+用法: /news_pusher [子命令]
+
+子命令:
+• subscribe - 订阅新闻推送
+• unsubscribe - 取消订阅
+• news - 获取最新新闻
+• help - 显示帮助
+• status - 查看状态
+
+功能说明:
+• 每日自动推送金融新闻
+• 支持手动获取最新新闻
+• 多源新闻聚合
+
+示例:
+• /news_pusher subscribe - 订阅新闻
+• /news_pusher unsubscribe - 取消订阅
+• /news_pusher news - 获取最新新闻
+• /news_pusher status - 查看状态
+    """
+}
+
+
 class HelpPlugin(BasePlugin):
     """帮助插件"""
     
@@ -30,16 +173,8 @@ class HelpPlugin(BasePlugin):
     
     def execute_command(self, command: str, **kwargs) -> str:
         """执行插件命令"""
-        if command == "help" or command == "":
-            return self.get_main_help()
-        elif command == "commands":
-            return self.get_commands_help()
-        elif command == "plugins":
-            return self.get_plugins_help()
-        elif command == "about":
-            return self.get_about_info()
-        else:
-            return self.get_command_help(command)
+        handler = self._DISPATCH.get(command)
+        return handler(self) if handler else self.get_command_help(command)
     
     def get_help(self) -> str:
         """获取帮助信息"""
@@ -201,145 +336,17 @@ class HelpPlugin(BasePlugin):
     
     def get_command_help(self, command: str) -> str:
         """获取特定命令帮助"""
-        command_help = {
-            "help": """
-📖 help 命令帮助
-
-用法: help [子命令]
-
-子命令:
-• help - 显示主帮助信息
-• commands - 显示所有命令
-• plugins - 显示插件信息
-• about - 显示关于信息
-
-示例:
-• help - 显示主帮助
-• help commands - 显示命令列表
-• help plugins - 显示插件信息
-            """,
-            
-            "status": """
-📊 status 命令帮助
-
-用法: status
-
-功能: 查看机器人运行状态
-
-显示信息:
-• 插件运行状态
-• 系统配置状态
-• 数据库连接状态
-• 各插件统计信息
-
-示例:
-• status - 查看系统状态
-            """,
-            
-            "plugins": """
-📦 plugins 命令帮助
-
-用法: plugins
-
-功能: 查看已安装插件
-
-显示信息:
-• 插件列表
-• 插件版本
-• 插件描述
-• 运行状态
-
-示例:
-• plugins - 查看插件列表
-            """,
-            
-            "reload": """
-🔄 reload 命令帮助
-
-用法: reload
-
-功能: 重新加载所有插件
-
-注意事项:
-• 会重新加载所有启用的插件
-• 正在运行的任务会受到影响
-• 建议在维护时使用
-
-示例:
-• reload - 重新加载插件
-            """,
-            
-            "file_converter": """
-📁 file_converter 命令帮助
-
-用法: /file_converter [子命令]
-
-子命令:
-• help - 显示文件转换帮助
-• status - 查看转换状态
-
-支持格式:
-• Word文档 (.doc/.docx) → PDF
-• 图片文件 (.jpg/.png等) → PDF
-• PDF文件 → Word文档
-
-使用方法:
-• 直接发送文件即可自动转换
-• 转换后的文件会自动发送给您
-
-示例:
-• /file_converter help - 查看帮助
-• /file_converter status - 查看状态
-            """,
-            
-            "scheduler": """
-⏰ scheduler 命令帮助
-
-用法: /scheduler [子命令] [参数]
-
-子命令:
-• add - 添加定时任务
-• list - 查看所有任务
-• delete - 删除指定任务
-• help - 显示帮助
-• status - 查看状态
-
-时间格式:
-• daily HH:MM - 每日执行
-• weekly 0-6 HH:MM - 每周指定天执行
-• once YYYY-MM-DD HH:MM - 一次性执行
-
-示例:
-• /scheduler add daily 09:00 早安提醒
-• /scheduler add weekly 1 18:00 周会提醒
-• /scheduler add once 2024-01-01 10:00 新年快乐
-• /scheduler list - 查看所有任务
-• /scheduler delete 1 - 删除任务ID为1的任务
-            """,
-            
-            "news_pusher": """
-📰 news_pusher 命令帮助
-
-用法: /news_pusher [子命令]
-
-子命令:
-• subscribe - 订阅新闻推送
-• unsubscribe - 取消订阅
-• news - 获取最新新闻
-• help - 显示帮助
-• status - 查看状态
-
-功能说明:
-• 每日自动推送金融新闻
-• 支持手动获取最新新闻
-• 多源新闻聚合
-
-示例:
-• /news_pusher subscribe - 订阅新闻
-• /news_pusher unsubscribe - 取消订阅
-• /news_pusher news - 获取最新新闻
-• /news_pusher status - 查看状态
-            """
-        }
-        
-        return command_help.get(command, f"未找到命令 '{command}' 的帮助信息，请使用 'help' 查看所有可用命令。") 
\ No newline at end of file
+        return _COMMAND_HELP.get(command, f"未找到命令 '{command}' 的帮助信息，请使用 'help' 查看所有可用命令。")
+    
+    # 子命令 -> 处理方法，execute_command 一次查表完成分发
+    _DISPATCH = {
+        "": get_main_help,
+        "help": get_main_help,
+        "commands": get_commands_help,
+        "plugins": get_plugins_help,
+        "about": get_about_info,
+    }
+
+
+# 供插件管理器直接定位插件类
+PLUGIN_CLASS = HelpPlugin
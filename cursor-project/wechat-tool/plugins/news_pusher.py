@@ -8,7 +8,8 @@ import json
 import sqlite3
 import requests
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from string import Template
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 from loguru import logger
 
@@ -16,10 +17,117 @@ import itchat
 from bs4 import BeautifulSoup
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import zip_longest
 
 from core.base_plugin import BasePlugin
 
 
+# 每个连接打开时执行: WAL 让读写互不阻塞，synchronous=NORMAL 在 WAL 下只在检查点时 fsync
+_SQLITE_PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-20000;
+"""
+
+# 每日推送时同时发送消息的最大线程数
+_PUSH_CONCURRENCY = 5
+
+# 每批推送的用户数及批次之间的间隔(秒)，避免触发微信的频率限制
+_PUSH_BATCH_SIZE = 20
+_PUSH_BATCH_INTERVAL = 0.2
+
+# 同时抓取的新闻源数量上限
+_FETCH_CONCURRENCY = 4
+
+# 新闻统计数据的缓存时间(秒)
+_STATUS_CACHE_TTL = 30
+
+# 模拟新闻数据，按新闻源地址分组
+_MOCK_NEWS = {
+    "https://www.jrj.com.cn/": [
+        {
+            "title": "央行降准0.25个百分点，释放长期资金约5000亿元",
+            "source": "金融界",
+            "summary": "中国人民银行决定于2024年1月15日下调金融机构存款准备金率0.25个百分点...",
+        },
+        {
+            "title": "数字人民币试点范围进一步扩大",
+            "source": "金融界",
+            "summary": "数字人民币试点工作稳步推进，试点范围进一步扩大，应用场景不断丰富...",
+        },
+    ],
+    "https://finance.sina.com.cn/": [
+        {
+            "title": "A股三大指数集体上涨，创业板指涨超2%",
+            "source": "新浪财经",
+            "summary": "今日A股市场表现强劲，三大指数集体上涨，创业板指涨幅超过2%...",
+        },
+        {
+            "title": "银行理财产品收益率持续下行",
+            "source": "新浪财经",
+            "summary": "受市场利率下行影响，银行理财产品收益率持续走低，投资者需关注风险...",
+        },
+    ],
+    "https://www.10jqka.com.cn/": [
+        {
+            "title": "基金公司积极布局ESG投资，绿色金融成新趋势",
+            "source": "同花顺财经",
+            "summary": "随着ESG投资理念的普及，越来越多的基金公司开始布局绿色金融产品...",
+        },
+    ],
+}
+
+
+# 插件帮助信息
+_HELP_TEXT = """
+📰 新闻推送插件帮助
+
+📋 可用命令：
+• /news_pusher subscribe - 订阅每日新闻推送
+• /news_pusher unsubscribe - 取消订阅
+• /news_pusher news - 获取最新新闻
+• /news_pusher status - 查看插件状态
+
+📰 新闻来源：
+• 金融界
+• 新浪财经
+• 同花顺财经
+
+🔍 关注领域：
+• 金融动态
+• 股市行情
+• 基金投资
+• 理财资讯
+
+💡 提示：
+• 订阅后每日自动推送热门新闻
+• 支持手动获取最新新闻
+• 新闻内容经过筛选，确保质量
+"""
+
+# 插件状态模板，每次查询只做一次替换
+_STATUS_TEMPLATE = Template("""
+📰 新闻推送插件状态
+
+✅ 运行状态: $running
+🔄 推送线程: $thread
+👥 订阅用户: $subscriber_count 人
+📊 新闻统计:
+• 总新闻数: $total_news
+• 今日新闻: $today_news
+
+📰 新闻来源: $sources
+🔍 关注关键词: $keywords
+
+💡 提示：
+• 每日上午9点自动推送
+• 使用 /news_pusher subscribe 订阅
+• 使用 /news_pusher news 获取最新新闻
+""")
+
+
 class NewsPusherPlugin(BasePlugin):
     """新闻推送插件"""
     
@@ -33,14 +141,27 @@ class NewsPusherPlugin(BasePlugin):
         self.news_sources = self.config.get("news.sources", [])
         self.keywords = self.config.get("news.keywords", [])
         self.max_news_count = self.config.get("news.max_news_count", 5)
+        self.subscribers_file = self.config.get("news.subscribers_file", "data/news_subscribers.json")
+        # 状态信息中的来源和关键词不会变化，只拼接一次
+        self._sources_text = ', '.join(self.news_sources)
+        self._keywords_text = ', '.join(self.keywords)
         
         # 数据库配置
         self.db_path = self.config.get("database.path", "data/wechat_bot.db")
+        # 长连接在首次使用时打开，推送/调度线程与命令处理共用，需加锁访问
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        # 新闻统计缓存: (过期时间, 日期, 总新闻数, 今日新闻数)，写入新闻时失效
+        self._status_cache = None
+        # 当天格式化好的新闻文本: (日期, 最新新闻, 每日推送)
+        self._daily_cache = None
         self._init_database()
         
         # 新闻推送线程
         self.news_thread = None
         self.is_news_running = False
+        # 停止时置位，立即唤醒正在等待的推送线程
+        self._wake = threading.Event()
         
         # 订阅用户列表
         self.subscribers = set()
@@ -56,6 +177,7 @@ class NewsPusherPlugin(BasePlugin):
         """停止插件"""
         self.is_running = False
         self._stop_news_thread()
+        self._close_connection()
         logger.info("新闻推送插件已停止")
     
     def execute_command(self, command: str, **kwargs) -> str:
@@ -77,31 +199,26 @@ class NewsPusherPlugin(BasePlugin):
     
     def get_help(self) -> str:
         """获取帮助信息"""
-        return """
-📰 新闻推送插件帮助
-
-📋 可用命令：
-• /news_pusher subscribe - 订阅每日新闻推送
-• /news_pusher unsubscribe - 取消订阅
-• /news_pusher news - 获取最新新闻
-• /news_pusher status - 查看插件状态
-
-📰 新闻来源：
-• 金融界
-• 新浪财经
-• 同花顺财经
-
-🔍 关注领域：
-• 金融动态
-• 股市行情
-• 基金投资
-• 理财资讯
-
-💡 提示：
-• 订阅后每日自动推送热门新闻
-• 支持手动获取最新新闻
-• 新闻内容经过筛选，确保质量
-        """
+        return _HELP_TEXT
+    
+    def _connect(self) -> sqlite3.Connection:
+        """打开数据库连接并应用性能相关的 PRAGMA"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.executescript(_SQLITE_PRAGMAS)
+        return conn
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """获取共享的数据库连接，调用方需持有 _db_lock"""
+        if self._conn is None:
+            self._conn = self._connect()
+        return self._conn
+    
+    def _close_connection(self) -> None:
+        """关闭共享的数据库连接"""
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
     
     def _init_database(self) -> None:
         """初始化数据库"""
@@ -109,32 +226,27 @@ class NewsPusherPlugin(BasePlugin):
             # 确保目录存在
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # 创建新闻表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS news_articles (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    content TEXT,
-                    url TEXT,
-                    source TEXT NOT NULL,
-                    published_at TIMESTAMP,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # 创建订阅用户表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS news_subscribers (
-                    user_id TEXT PRIMARY KEY,
-                    subscribed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            conn.commit()
-            conn.close()
+            with self._db_lock:
+                conn = self._get_connection()
+                cursor = conn.cursor()
+                
+                # 创建新闻表
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS news_articles (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        title TEXT NOT NULL,
+                        content TEXT,
+                        url TEXT,
+                        source TEXT NOT NULL,
+                        published_at TIMESTAMP,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                
+                # 按发布时间统计今日新闻时使用
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_news_published ON news_articles(published_at)')
+                
+                conn.commit()
             logger.info("新闻推送数据库初始化完成")
             
         except Exception as e:
@@ -143,24 +255,43 @@ class NewsPusherPlugin(BasePlugin):
     def _load_subscribers(self) -> None:
         """加载订阅用户"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT user_id FROM news_subscribers')
-            subscribers = cursor.fetchall()
-            
-            self.subscribers = {row[0] for row in subscribers}
-            conn.close()
+            if os.path.exists(self.subscribers_file):
+                with open(self.subscribers_file, 'r', encoding='utf-8') as f:
+                    self.subscribers = set(json.load(f))
+            else:
+                # 旧版本把订阅用户存放在数据库中，首次启动时迁移到文件
+                self.subscribers = self._load_legacy_subscribers()
+                if self.subscribers:
+                    self._save_subscribers(self.subscribers)
             
             logger.info(f"加载了 {len(self.subscribers)} 个订阅用户")
             
         except Exception as e:
             logger.error(f"加载订阅用户失败: {e}")
     
+    def _load_legacy_subscribers(self) -> set:
+        """从旧的 news_subscribers 表读取订阅用户，表不存在时返回空集合"""
+        with self._db_lock:
+            conn = self._get_connection()
+            try:
+                rows = conn.execute('SELECT user_id FROM news_subscribers').fetchall()
+            except sqlite3.OperationalError:
+                return set()
+        return {row[0] for row in rows}
+    
+    def _save_subscribers(self, subscribers: set) -> None:
+        """把订阅用户写入文件，先写临时文件再替换，避免写到一半留下损坏的文件"""
+        os.makedirs(os.path.dirname(self.subscribers_file) or '.', exist_ok=True)
+        tmp_path = self.subscribers_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(sorted(subscribers), f, ensure_ascii=False)
+        os.replace(tmp_path, self.subscribers_file)
+    
     def _start_news_thread(self) -> None:
         """启动新闻推送线程"""
         if self.news_thread is None or not self.news_thread.is_alive():
             self.is_news_running = True
+            self._wake.clear()
             self.news_thread = threading.Thread(target=self._run_news_scheduler, daemon=True)
             self.news_thread.start()
             logger.info("新闻推送线程已启动")
@@ -168,6 +299,7 @@ class NewsPusherPlugin(BasePlugin):
     def _stop_news_thread(self) -> None:
         """停止新闻推送线程"""
         self.is_news_running = False
+        self._wake.set()
         if self.news_thread and self.news_thread.is_alive():
             self.news_thread.join(timeout=5)
         logger.info("新闻推送线程已停止")
@@ -176,17 +308,24 @@ class NewsPusherPlugin(BasePlugin):
         """运行新闻推送调度器"""
         while self.is_news_running:
             try:
-                current_time = datetime.now()
+                # 每天上午9点推送新闻：直接等到下一个9点，而不是每分钟轮询
+                now = datetime.now()
+                target = now.replace(hour=9, minute=0, second=0, microsecond=0)
+                if target <= now:
+                    target += timedelta(days=1)
+                
+                if self._wake.wait(timeout=(target - now).total_seconds()):
+                    break  # 插件停止
                 
-                # 每天上午9点推送新闻
-                if current_time.hour == 9 and current_time.minute == 0:
-                    self._push_daily_news()
+                # 提前醒来(如系统时间被调整)时重新计算等待时间
+                if datetime.now() < target:
+                    continue
                 
-                time.sleep(60)  # 每分钟检查一次
+                self._push_daily_news()
                 
             except Exception as e:
                 logger.error(f"新闻推送调度器错误: {e}")
-                time.sleep(300)  # 出错后等待5分钟
+                self._wake.wait(timeout=300)  # 出错后等待5分钟
     
     def _subscribe_user(self, user_id: str) -> str:
         """订阅用户"""
@@ -194,17 +333,8 @@ class NewsPusherPlugin(BasePlugin):
             if user_id in self.subscribers:
                 return "您已经订阅了新闻推送"
             
-            # 添加到数据库
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO news_subscribers (user_id)
-                VALUES (?)
-            ''', (user_id,))
-            
-            conn.commit()
-            conn.close()
+            # 写入订阅文件
+            self._save_subscribers(self.subscribers | {user_id})
             
             # 添加到内存
             self.subscribers.add(user_id)
@@ -222,13 +352,8 @@ class NewsPusherPlugin(BasePlugin):
             if user_id not in self.subscribers:
                 return "您还没有订阅新闻推送"
             
-            # 从数据库删除
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('DELETE FROM news_subscribers WHERE user_id = ?', (user_id,))
-            conn.commit()
-            conn.close()
+            # 从订阅文件删除
+            self._save_subscribers(self.subscribers - {user_id})
             
             # 从内存删除
             self.subscribers.discard(user_id)
@@ -243,27 +368,49 @@ class NewsPusherPlugin(BasePlugin):
     def _get_latest_news(self) -> str:
         """获取最新新闻"""
         try:
-            # 抓取最新新闻
-            news_list = self._fetch_latest_news()
+            daily_texts = self._get_daily_texts()
             
-            if not news_list:
+            if not daily_texts:
                 return "暂无最新新闻"
             
-            # 格式化新闻内容
-            news_text = "📰 最新金融新闻：\n\n"
-            for i, news in enumerate(news_list[:self.max_news_count], 1):
-                news_text += f"{i}. {news['title']}\n"
-                news_text += f"   来源: {news['source']}\n"
-                if news.get('summary'):
-                    news_text += f"   摘要: {news['summary'][:100]}...\n"
-                news_text += "\n"
-            
-            return news_text.strip()
+            return daily_texts[0]
             
         except Exception as e:
             logger.error(f"获取最新新闻失败: {e}")
             return f"获取新闻失败: {str(e)}"
     
+    def _get_daily_texts(self) -> Optional[Tuple[str, str]]:
+        """获取当天的(最新新闻, 每日推送)文本，每天只抓取和格式化一次"""
+        today = datetime.now().date()
+        cache = self._daily_cache
+        if cache and cache[0] == today:
+            return cache[1], cache[2]
+        
+        # 抓取最新新闻
+        news_list = self._fetch_latest_news()
+        if not news_list:
+            return None
+        top_news = news_list[:self.max_news_count]
+        
+        # 格式化新闻内容，逐行收集后一次 join
+        news_lines = ["📰 最新金融新闻：", ""]
+        for i, news in enumerate(top_news, 1):
+            news_lines.append(f"{i}. {news['title']}")
+            news_lines.append(f"   来源: {news['source']}")
+            if news.get('summary'):
+                news_lines.append(f"   摘要: {news['summary'][:100]}...")
+            news_lines.append("")
+        news_text = "\n".join(news_lines).strip()
+        
+        # 格式化推送内容
+        push_lines = ["📰 每日金融新闻推送", "", f"📅 {today.strftime('%Y年%m月%d日')}", ""]
+        for i, news in enumerate(top_news, 1):
+            push_lines.extend([f"{i}. {news['title']}", f"   来源: {news['source']}", ""])
+        push_text = "\n".join(push_lines) + "\n"
+        
+        self._daily_cache = (today, news_text, push_text)
+        return news_text, push_text
+    
     def _push_daily_news(self) -> None:
         """推送每日新闻"""
         try:
@@ -271,30 +418,33 @@ class NewsPusherPlugin(BasePlugin):
                 logger.info("没有订阅用户，跳过新闻推送")
                 return
             
-            # 获取最新新闻
-            news_list = self._fetch_latest_news()
+            # 获取当天的推送内容
+            daily_texts = self._get_daily_texts()
             
-            if not news_list:
+            if not daily_texts:
                 logger.info("没有获取到新闻，跳过推送")
                 return
-            
-            # 格式化推送内容
-            push_text = "📰 每日金融新闻推送\n\n"
-            push_text += f"📅 {datetime.now().strftime('%Y年%m月%d日')}\n\n"
-            
-            for i, news in enumerate(news_list[:self.max_news_count], 1):
-                push_text += f"{i}. {news['title']}\n"
-                push_text += f"   来源: {news['source']}\n\n"
-            
-            # 推送给所有订阅用户
-            for user_id in self.subscribers:
-                try:
-                    itchat.send_msg(push_text, toUserName=user_id)
-                    logger.info(f"已推送新闻给用户 {user_id}")
-                except Exception as e:
-                    logger.error(f"推送新闻给用户 {user_id} 失败: {e}")
-            
-            logger.info(f"每日新闻推送完成，共推送给 {len(self.subscribers)} 个用户")
+            push_text = daily_texts[1]
+            
+            # 按批并发推送给订阅用户，每批发完后稍作停顿
+            subscribers = list(self.subscribers)
+            with ThreadPoolExecutor(max_workers=min(_PUSH_CONCURRENCY, len(subscribers))) as executor:
+                for start in range(0, len(subscribers), _PUSH_BATCH_SIZE):
+                    if start:
+                        time.sleep(_PUSH_BATCH_INTERVAL)
+                    
+                    futures = {
+                        user_id: executor.submit(itchat.send_msg, push_text, toUserName=user_id)
+                        for user_id in subscribers[start:start + _PUSH_BATCH_SIZE]
+                    }
+                    for user_id, future in futures.items():
+                        error = future.exception()
+                        if error is None:
+                            logger.info(f"已推送新闻给用户 {user_id}")
+                        else:
+                            logger.error(f"推送新闻给用户 {user_id} 失败: {error}")
+            
+            logger.info(f"每日新闻推送完成，共推送给 {len(subscribers)} 个用户")
             
         except Exception as e:
             logger.error(f"推送每日新闻失败: {e}")
@@ -304,120 +454,118 @@ class NewsPusherPlugin(BasePlugin):
         news_list = []
         
         try:
-            # 这里实现具体的新闻抓取逻辑
-            # 由于实际抓取需要处理反爬虫等问题，这里提供模拟数据
+            # 各新闻源并发抓取，总耗时取决于最慢的新闻源
+            sources = self.news_sources
+            if sources:
+                with ThreadPoolExecutor(max_workers=min(_FETCH_CONCURRENCY, len(sources))) as executor:
+                    results = list(executor.map(self._fetch_source, sources))
+                
+                # 轮流从各新闻源取一条，让排在前面的新闻来自不同来源
+                news_list = [news for group in zip_longest(*results) for news in group if news is not None]
             
-            mock_news = [
-                {
-                    "title": "央行降准0.25个百分点，释放长期资金约5000亿元",
-                    "source": "金融界",
-                    "summary": "中国人民银行决定于2024年1月15日下调金融机构存款准备金率0.25个百分点...",
-                    "url": "https://www.jrj.com.cn/",
-                    "published_at": datetime.now()
-                },
-                {
-                    "title": "A股三大指数集体上涨，创业板指涨超2%",
-                    "source": "新浪财经",
-                    "summary": "今日A股市场表现强劲，三大指数集体上涨，创业板指涨幅超过2%...",
-                    "url": "https://finance.sina.com.cn/",
-                    "published_at": datetime.now()
-                },
-                {
-                    "title": "基金公司积极布局ESG投资，绿色金融成新趋势",
-                    "source": "同花顺财经",
-                    "summary": "随着ESG投资理念的普及，越来越多的基金公司开始布局绿色金融产品...",
-                    "url": "https://www.10jqka.com.cn/",
-                    "published_at": datetime.now()
-                },
-                {
-                    "title": "数字人民币试点范围进一步扩大",
-                    "source": "金融界",
-                    "summary": "数字人民币试点工作稳步推进，试点范围进一步扩大，应用场景不断丰富...",
-                    "url": "https://www.jrj.com.cn/",
-                    "published_at": datetime.now()
-                },
-                {
-                    "title": "银行理财产品收益率持续下行",
-                    "source": "新浪财经",
-                    "summary": "受市场利率下行影响，银行理财产品收益率持续走低，投资者需关注风险...",
-                    "url": "https://finance.sina.com.cn/",
-                    "published_at": datetime.now()
-                }
-            ]
+            # 配置的新闻源都没有数据时退回到全部模拟新闻，不让订阅用户收到空推送
+            if not news_list:
+                results = [self._fetch_source(source_url) for source_url in _MOCK_NEWS]
+                news_list = [news for group in zip_longest(*results) for news in group if news is not None]
             
             # 保存到数据库
-            self._save_news_to_db(mock_news)
-            
-            news_list = mock_news
+            if news_list:
+                self._save_news_to_db(news_list)
             
         except Exception as e:
             logger.error(f"抓取新闻失败: {e}")
         
         return news_list
     
+    def _fetch_source(self, source_url: str) -> List[Dict[str, Any]]:
+        """抓取单个新闻源"""
+        try:
+            # 这里实现具体的新闻抓取逻辑
+            # 由于实际抓取需要处理反爬虫等问题，这里提供模拟数据
+            items = _MOCK_NEWS.get(source_url)
+            if items is None:
+                logger.warning(f"新闻源 {source_url} 暂无可用数据")
+                return []
+            
+            now = datetime.now()
+            return [dict(news, url=source_url, published_at=now) for news in items]
+            
+        except Exception as e:
+            logger.error(f"抓取新闻源 {source_url} 失败: {e}")
+            return []
+    
     def _save_news_to_db(self, news_list: List[Dict[str, Any]]) -> None:
         """保存新闻到数据库"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            for news in news_list:
-                cursor.execute('''
-                    INSERT INTO news_articles (title, content, url, source, published_at)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (
+            rows = [
+                (
                     news['title'],
                     news.get('summary', ''),
                     news.get('url', ''),
                     news['source'],
                     news.get('published_at', datetime.now())
-                ))
+                )
+                for news in news_list
+            ]
             
-            conn.commit()
-            conn.close()
+            # 整批写入放在一个事务中，只提交一次
+            with self._db_lock:
+                conn = self._get_connection()
+                with conn:
+                    conn.executemany('''
+                        INSERT INTO news_articles (title, content, url, source, published_at)
+                        VALUES (?, ?, ?, ?, ?)
+                    ''', rows)
+                self._status_cache = None
             
         except Exception as e:
             logger.error(f"保存新闻到数据库失败: {e}")
     
-    def _get_news_status(self) -> str:
-        """获取新闻推送状态"""
-        try:
-            conn = sqlite3.connect(self.db_path)
+    def _count_news(self) -> Tuple[int, int]:
+        """统计新闻总数和今日新闻数，结果缓存一段时间"""
+        today = datetime.now().date()
+        with self._db_lock:
+            cache = self._status_cache
+            if cache and cache[0] > time.monotonic() and cache[1] == today:
+                return cache[2], cache[3]
+            
+            conn = self._get_connection()
             cursor = conn.cursor()
             
             # 获取新闻总数
             cursor.execute('SELECT COUNT(*) FROM news_articles')
             total_news = cursor.fetchone()[0]
             
-            # 获取今日新闻数
-            today = datetime.now().date()
+            # 获取今日新闻数，用范围条件而不是 DATE() 以便走索引
             cursor.execute('''
                 SELECT COUNT(*) FROM news_articles 
-                WHERE DATE(published_at) = ?
-            ''', (today,))
+                WHERE published_at >= ? AND published_at < ?
+            ''', (today, today + timedelta(days=1)))
             today_news = cursor.fetchone()[0]
             
-            conn.close()
-            
-            return f"""
-📰 新闻推送插件状态
-
-✅ 运行状态: {'运行中' if self.is_running else '已停止'}
-🔄 推送线程: {'运行中' if self.is_news_running else '已停止'}
-👥 订阅用户: {len(self.subscribers)} 人
-📊 新闻统计:
-• 总新闻数: {total_news}
-• 今日新闻: {today_news}
-
-📰 新闻来源: {', '.join(self.news_sources)}
-🔍 关注关键词: {', '.join(self.keywords)}
-
-💡 提示：
-• 每日上午9点自动推送
-• 使用 /news_pusher subscribe 订阅
-• 使用 /news_pusher news 获取最新新闻
-            """
+            self._status_cache = (time.monotonic() + _STATUS_CACHE_TTL, today, total_news, today_news)
+        
+        return total_news, today_news
+    
+    def _get_news_status(self) -> str:
+        """获取新闻推送状态"""
+        try:
+            total_news, today_news = self._count_news()
+            
+            return _STATUS_TEMPLATE.substitute(
+                running='运行中' if self.is_running else '已停止',
+                thread='运行中' if self.is_news_running else '已停止',
+                subscriber_count=len(self.subscribers),
+                total_news=total_news,
+                today_news=today_news,
+                sources=self._sources_text,
+                keywords=self._keywords_text,
+            )
             
         except Exception as e:
             logger.error(f"获取新闻状态失败: {e}")
-            return "获取状态失败" 
\ No newline at end of file
+            return "获取状态失败"
+
+
+# 供插件管理器直接定位插件类
+PLUGIN_CLASS = NewsPusherPlugin
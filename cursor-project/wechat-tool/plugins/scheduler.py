@@ -4,9 +4,12 @@
 """
 
 import os
+import re
+import math
 import json
 import sqlite3
 from datetime import datetime, timedelta
+from string import Template
 from typing import Dict, List, Any, Optional
 from pathlib import Path
 from loguru import logger
@@ -19,6 +22,87 @@ import threading
 from core.base_plugin import BasePlugin
 
 
+# 每个连接打开时执行: WAL 让读写互不阻塞，synchronous=NORMAL 在 WAL 下只在检查点时 fsync
+_SQLITE_PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-20000;
+"""
+
+# 任务列表中各任务之间的分隔线
+_SEP = "─" * 30
+
+# 星期编号(0=周日)对应的 schedule 方法名
+_WEEKDAYS = ("sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday")
+
+# 预编译的时间格式: HH:MM (daily) 与 0-6 HH:MM (weekly)
+_HHMM = re.compile(r"([01]\d|2[0-3]):[0-5]\d")
+_WEEKLY = re.compile(r"[0-6] ([01]\d|2[0-3]):[0-5]\d")
+
+
+def _validate_once(schedule_time: str) -> bool:
+    """验证一次性任务时间，格式: YYYY-MM-DD HH:MM"""
+    try:
+        datetime.strptime(schedule_time, "%Y-%m-%d %H:%M")
+        return True
+    except ValueError:
+        return False
+
+
+# 任务类型 -> 时间格式校验函数
+_TIME_VALIDATORS = {
+    "daily": _HHMM.fullmatch,
+    "weekly": _WEEKLY.fullmatch,
+    "once": _validate_once,
+}
+
+# 任务类型 -> 时间参数占用的空格分隔字段数，其后全部为提醒消息
+_TIME_FIELDS = {
+    "daily": 1,   # HH:MM
+    "weekly": 2,  # D HH:MM
+    "once": 2,    # YYYY-MM-DD HH:MM
+}
+
+
+# 插件帮助信息
+_HELP_TEXT = """
+⏰ 定时任务插件帮助
+
+📋 可用命令：
+• /scheduler add daily 09:00 早安提醒 - 添加每日9点提醒
+• /scheduler add weekly 1 18:00 周会提醒 - 添加每周一18点提醒
+• /scheduler add once 2024-01-01 10:00 新年快乐 - 添加一次性提醒
+• /scheduler list - 查看所有定时任务
+• /scheduler delete 任务ID - 删除指定任务
+• /scheduler status - 查看插件状态
+
+⏰ 时间格式：
+• daily HH:MM - 每日执行
+• weekly 0-6 HH:MM - 每周指定天执行 (0=周日)
+• once YYYY-MM-DD HH:MM - 一次性执行
+
+💡 提示：
+• 时间格式为24小时制
+• 任务ID在list命令中查看
+• 支持自定义消息内容
+"""
+
+# 插件状态模板，每次查询只做一次替换
+_STATUS_TEMPLATE = Template("""
+⏰ 定时任务插件状态
+
+✅ 运行状态: $running
+🔄 调度器状态: $scheduler
+📊 总任务数: $total_tasks
+📅 数据库: $db_path
+
+💡 提示：
+• 使用 /scheduler help 查看详细帮助
+• 使用 /scheduler list 查看您的任务
+""")
+
+
 class SchedulerPlugin(BasePlugin):
     """定时任务插件"""
     
@@ -30,18 +114,25 @@ class SchedulerPlugin(BasePlugin):
         
         # 数据库配置
         self.db_path = self.config.get("database.path", "data/wechat_bot.db")
+        # 长连接在首次使用时打开，推送/调度线程与命令处理共用，需加锁访问
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
         self._init_database()
         
+        # 有效任务ID，触发时直接在内存中判断任务是否已被删除
+        self._active_task_ids = set()
+        # 任务ID -> schedule.Job，删除任务时用于取消调度
+        self._jobs: Dict[int, schedule.Job] = {}
+        
         # 定时任务线程
         self.scheduler_thread = None
         self.is_scheduler_running = False
-        
-        # 加载现有任务
-        self._load_existing_tasks()
     
     def start(self) -> None:
         """启动插件"""
         self.is_running = True
+        # 加载现有任务，stop() 时取消的任务在重新启动后恢复
+        self._load_existing_tasks()
         self._start_scheduler_thread()
         logger.info("定时任务插件已启动")
     
@@ -49,48 +140,39 @@ class SchedulerPlugin(BasePlugin):
         """停止插件"""
         self.is_running = False
         self._stop_scheduler_thread()
+        self._unschedule_all()
+        self._close_connection()
         logger.info("定时任务插件已停止")
     
     def execute_command(self, command: str, **kwargs) -> str:
         """执行插件命令"""
         user_id = kwargs.get('user_id', '')
-        
-        if command.startswith("add"):
-            return self._add_scheduled_task(command, user_id)
-        elif command.startswith("list"):
-            return self._list_scheduled_tasks(user_id)
-        elif command.startswith("delete"):
-            return self._delete_scheduled_task(command, user_id)
-        elif command.startswith("help"):
-            return self.get_help()
-        elif command.startswith("status"):
-            return self._get_scheduler_status()
-        else:
-            return "未知命令，输入 'help' 查看帮助"
+        verb, _, args = command.partition(' ')
+        handler = self._DISPATCH.get(verb)
+        return handler(self, args, user_id) if handler else "未知命令，输入 'help' 查看帮助"
     
     def get_help(self) -> str:
         """获取帮助信息"""
-        return """
-⏰ 定时任务插件帮助
-
-📋 可用命令：
-• /scheduler add daily 09:00 早安提醒 - 添加每日9点提醒
-• /scheduler add weekly 1 18:00 周会提醒 - 添加每周一18点提醒
-• /scheduler add once 2024-01-01 10:00 新年快乐 - 添加一次性提醒
-• /scheduler list - 查看所有定时任务
-• /scheduler delete 任务ID - 删除指定任务
-• /scheduler status - 查看插件状态
-
-⏰ 时间格式：
-• daily HH:MM - 每日执行
-• weekly 0-6 HH:MM - 每周指定天执行 (0=周日)
-• once YYYY-MM-DD HH:MM - 一次性执行
-
-💡 提示：
-• 时间格式为24小时制
-• 任务ID在list命令中查看
-• 支持自定义消息内容
-        """
+        return _HELP_TEXT
+    
+    def _connect(self) -> sqlite3.Connection:
+        """打开数据库连接并应用性能相关的 PRAGMA"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.executescript(_SQLITE_PRAGMAS)
+        return conn
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """获取共享的数据库连接，调用方需持有 _db_lock"""
+        if self._conn is None:
+            self._conn = self._connect()
+        return self._conn
+    
+    def _close_connection(self) -> None:
+        """关闭共享的数据库连接"""
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
     
     def _init_database(self) -> None:
         """初始化数据库"""
@@ -98,24 +180,30 @@ class SchedulerPlugin(BasePlugin):
             # 确保目录存在
             os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # 创建定时任务表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS scheduled_tasks (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT NOT NULL,
-                    task_type TEXT NOT NULL,
-                    schedule_time TEXT NOT NULL,
-                    message TEXT NOT NULL,
-                    is_active INTEGER DEFAULT 1,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            conn.commit()
-            conn.close()
+            with self._db_lock:
+                conn = self._get_connection()
+                cursor = conn.cursor()
+                
+                # 创建定时任务表
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS scheduled_tasks (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        user_id TEXT NOT NULL,
+                        task_type TEXT NOT NULL,
+                        schedule_time TEXT NOT NULL,
+                        message TEXT NOT NULL,
+                        is_active INTEGER DEFAULT 1,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                
+                # 按用户列出有效任务时使用
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_tasks_user_active
+                    ON scheduled_tasks(user_id, is_active)
+                ''')
+                
+                conn.commit()
             logger.info("定时任务数据库初始化完成")
             
         except Exception as e:
@@ -124,20 +212,24 @@ class SchedulerPlugin(BasePlugin):
     def _load_existing_tasks(self) -> None:
         """加载现有任务"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, user_id, task_type, schedule_time, message 
-                FROM scheduled_tasks 
-                WHERE is_active = 1
-            ''')
-            
-            tasks = cursor.fetchall()
-            for task in tasks:
-                self._schedule_task(task[0], task[1], task[2], task[3], task[4])
+            with self._db_lock:
+                conn = self._get_connection()
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT id, user_id, task_type, schedule_time, message 
+                    FROM scheduled_tasks 
+                    WHERE is_active = 1
+                ''')
+                
+                tasks = cursor.fetchall()
+                for task in tasks:
+                    if task[0] in self._jobs:
+                        # 已在调度中，重复启动时不再重复注册
+                        continue
+                    self._active_task_ids.add(task[0])
+                    self._schedule_task(task[0], task[1], task[2], task[3], task[4])
             
-            conn.close()
             logger.info(f"加载了 {len(tasks)} 个现有定时任务")
             
         except Exception as e:
@@ -168,17 +260,18 @@ class SchedulerPlugin(BasePlugin):
                 logger.error(f"定时任务调度器错误: {e}")
                 time.sleep(5)
     
-    def _add_scheduled_task(self, command: str, user_id: str) -> str:
+    def _add_scheduled_task(self, args: str, user_id: str) -> str:
         """添加定时任务"""
         try:
-            # 解析命令: add daily 09:00 早安提醒
-            parts = command.split(' ', 3)
-            if len(parts) < 4:
+            # 解析参数: daily 09:00 早安提醒 / weekly 1 18:00 周会提醒
+            task_type, _, args = args.partition(' ')
+            fields = _TIME_FIELDS.get(task_type, 1)
+            parts = args.split(' ', fields)
+            if len(parts) <= fields:
                 return "命令格式错误，请使用: add 类型 时间 消息"
             
-            task_type = parts[1]
-            schedule_time = parts[2]
-            message = parts[3]
+            schedule_time = ' '.join(parts[:fields])
+            message = parts[fields]
             
             # 验证时间格式
             if not self._validate_time_format(task_type, schedule_time):
@@ -199,68 +292,65 @@ class SchedulerPlugin(BasePlugin):
     def _list_scheduled_tasks(self, user_id: str) -> str:
         """列出定时任务"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, task_type, schedule_time, message, created_at
-                FROM scheduled_tasks 
-                WHERE user_id = ? AND is_active = 1
-                ORDER BY created_at DESC
-            ''', (user_id,))
-            
-            tasks = cursor.fetchall()
-            conn.close()
+            with self._db_lock:
+                conn = self._get_connection()
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT id, task_type, schedule_time, message, created_at
+                    FROM scheduled_tasks 
+                    WHERE user_id = ? AND is_active = 1
+                    ORDER BY created_at DESC
+                ''', (user_id,))
+                
+                tasks = cursor.fetchall()
             
             if not tasks:
                 return "您还没有定时任务"
             
-            result = "📋 您的定时任务：\n\n"
-            for task in tasks:
-                task_id, task_type, schedule_time, message, created_at = task
-                result += f"🆔 任务ID: {task_id}\n"
-                result += f"⏰ 类型: {task_type}\n"
-                result += f"🕐 时间: {schedule_time}\n"
-                result += f"💬 消息: {message}\n"
-                result += f"📅 创建时间: {created_at}\n"
-                result += "─" * 30 + "\n"
+            lines = ["📋 您的定时任务：", ""]
+            for task_id, task_type, schedule_time, message, created_at in tasks:
+                lines.extend([
+                    f"🆔 任务ID: {task_id}",
+                    f"⏰ 类型: {task_type}",
+                    f"🕐 时间: {schedule_time}",
+                    f"💬 消息: {message}",
+                    f"📅 创建时间: {created_at}",
+                    _SEP,
+                ])
             
-            return result.strip()
+            return "\n".join(lines)
             
         except Exception as e:
             logger.error(f"列出定时任务失败: {e}")
             return f"获取任务列表失败: {str(e)}"
     
-    def _delete_scheduled_task(self, command: str, user_id: str) -> str:
+    def _delete_scheduled_task(self, args: str, user_id: str) -> str:
         """删除定时任务"""
         try:
-            # 解析命令: delete 任务ID
-            parts = command.split(' ')
-            if len(parts) < 2:
+            # 解析参数: 任务ID
+            if not args:
                 return "请指定要删除的任务ID"
             
-            task_id = int(parts[1])
+            task_id = int(args)
             
-            # 从数据库删除
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            # 从数据库删除；无论是否命中都结束事务，避免共享连接上残留写锁
+            with self._db_lock:
+                conn = self._get_connection()
+                with conn:
+                    cursor = conn.execute('''
+                        UPDATE scheduled_tasks 
+                        SET is_active = 0 
+                        WHERE id = ? AND user_id = ? AND is_active = 1
+                    ''', (task_id, user_id))
+                deleted = cursor.rowcount > 0
             
-            cursor.execute('''
-                UPDATE scheduled_tasks 
-                SET is_active = 0 
-                WHERE id = ? AND user_id = ?
-            ''', (task_id, user_id))
-            
-            if cursor.rowcount > 0:
-                conn.commit()
-                conn.close()
-                
+            if deleted:
                 # 从调度器中移除
                 self._unschedule_task(task_id)
                 
                 return f"✅ 任务 {task_id} 已删除"
             else:
-                conn.close()
                 return "任务不存在或您没有权限删除"
             
         except ValueError:
@@ -271,44 +361,24 @@ class SchedulerPlugin(BasePlugin):
     
     def _validate_time_format(self, task_type: str, schedule_time: str) -> bool:
         """验证时间格式"""
-        try:
-            if task_type == "daily":
-                # 格式: HH:MM
-                time.strptime(schedule_time, "%H:%M")
-                return True
-            elif task_type == "weekly":
-                # 格式: 0-6 HH:MM
-                parts = schedule_time.split(' ')
-                if len(parts) != 2:
-                    return False
-                day = int(parts[0])
-                if day < 0 or day > 6:
-                    return False
-                time.strptime(parts[1], "%H:%M")
-                return True
-            elif task_type == "once":
-                # 格式: YYYY-MM-DD HH:MM
-                datetime.strptime(schedule_time, "%Y-%m-%d %H:%M")
-                return True
-            else:
-                return False
-        except:
-            return False
+        validator = _TIME_VALIDATORS.get(task_type)
+        return bool(validator and validator(schedule_time))
     
     def _save_task_to_db(self, user_id: str, task_type: str, schedule_time: str, message: str) -> int:
         """保存任务到数据库"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO scheduled_tasks (user_id, task_type, schedule_time, message)
-            VALUES (?, ?, ?, ?)
-        ''', (user_id, task_type, schedule_time, message))
-        
-        task_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self._db_lock:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT INTO scheduled_tasks (user_id, task_type, schedule_time, message)
+                VALUES (?, ?, ?, ?)
+            ''', (user_id, task_type, schedule_time, message))
+            
+            task_id = cursor.lastrowid
+            conn.commit()
         
+        self._active_task_ids.add(task_id)
         return task_id
     
     def _schedule_task(self, task_id: int, user_id: str, task_type: str, schedule_time: str, message: str) -> None:
@@ -317,7 +387,7 @@ class SchedulerPlugin(BasePlugin):
             if task_type == "daily":
                 # 每日任务
                 time_parts = schedule_time.split(':')
-                schedule.every().day.at(schedule_time).do(
+                job = schedule.every().day.at(schedule_time).do(
                     self._send_scheduled_message, user_id, message, task_id
                 )
                 
@@ -327,41 +397,19 @@ class SchedulerPlugin(BasePlugin):
                 day = int(parts[0])
                 time_str = parts[1]
                 
-                if day == 0:
-                    schedule.every().sunday.at(time_str).do(
-                        self._send_scheduled_message, user_id, message, task_id
-                    )
-                elif day == 1:
-                    schedule.every().monday.at(time_str).do(
-                        self._send_scheduled_message, user_id, message, task_id
-                    )
-                elif day == 2:
-                    schedule.every().tuesday.at(time_str).do(
-                        self._send_scheduled_message, user_id, message, task_id
-                    )
-                elif day == 3:
-                    schedule.every().wednesday.at(time_str).do(
-                        self._send_scheduled_message, user_id, message, task_id
-                    )
-                elif day == 4:
-                    schedule.every().thursday.at(time_str).do(
-                        self._send_scheduled_message, user_id, message, task_id
-                    )
-                elif day == 5:
-                    schedule.every().friday.at(time_str).do(
-                        self._send_scheduled_message, user_id, message, task_id
-                    )
-                elif day == 6:
-                    schedule.every().saturday.at(time_str).do(
-                        self._send_scheduled_message, user_id, message, task_id
-                    )
-                    
-            elif task_type == "once":
-                # 一次性任务
-                schedule.every().day.at(schedule_time.split(' ')[1]).do(
+                job = getattr(schedule.every(), _WEEKDAYS[day]).at(time_str).do(
                     self._send_scheduled_message, user_id, message, task_id
                 )
+                
+            elif task_type == "once":
+                # 一次性任务：到点执行一次后自行取消，已过期的任务尽快补发
+                run_at = datetime.strptime(schedule_time, "%Y-%m-%d %H:%M")
+                delay = max(1, math.ceil((run_at - datetime.now()).total_seconds()))
+                job = schedule.every(delay).seconds.do(
+                    self._run_once_task, user_id, message, task_id
+                )
             
+            self._jobs[task_id] = job
             logger.info(f"任务 {task_id} 已添加到调度器")
             
         except Exception as e:
@@ -369,25 +417,40 @@ class SchedulerPlugin(BasePlugin):
     
     def _unschedule_task(self, task_id: int) -> None:
         """从调度器中移除任务"""
-        # 注意：schedule库没有直接的方法来移除特定任务
-        # 这里只是记录日志，实际的任务清理需要在下次重启时进行
-        logger.info(f"任务 {task_id} 已标记为删除")
+        self._active_task_ids.discard(task_id)
+        job = self._jobs.pop(task_id, None)
+        if job is not None:
+            schedule.cancel_job(job)
+        logger.info(f"任务 {task_id} 已从调度器移除")
+    
+    def _unschedule_all(self) -> None:
+        """取消本实例注册的全部任务，避免卸载或重新加载后旧实例的任务仍留在全局调度器中"""
+        for job in self._jobs.values():
+            schedule.cancel_job(job)
+        self._jobs.clear()
+        self._active_task_ids.clear()
+    
+    def _run_once_task(self, user_id: str, message: str, task_id: int):
+        """执行一次性任务，执行后将其从调度器和数据库中移除"""
+        self._send_scheduled_message(user_id, message, task_id)
+        
+        self._active_task_ids.discard(task_id)
+        self._jobs.pop(task_id, None)
+        try:
+            with self._db_lock:
+                conn = self._get_connection()
+                with conn:
+                    conn.execute('UPDATE scheduled_tasks SET is_active = 0 WHERE id = ?', (task_id,))
+        except Exception as e:
+            logger.error(f"更新一次性任务状态失败: {e}")
+        
+        return schedule.CancelJob
     
     def _send_scheduled_message(self, user_id: str, message: str, task_id: int) -> None:
         """发送定时消息"""
         try:
             # 检查任务是否仍然有效
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT is_active FROM scheduled_tasks WHERE id = ?
-            ''', (task_id,))
-            
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result and result[0] == 1:
+            if task_id in self._active_task_ids:
                 # 发送消息
                 itchat.send_msg(message, toUserName=user_id)
                 logger.info(f"已发送定时消息: {message} 给用户 {user_id}")
@@ -400,29 +463,36 @@ class SchedulerPlugin(BasePlugin):
     def _get_scheduler_status(self) -> str:
         """获取调度器状态"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT COUNT(*) FROM scheduled_tasks WHERE is_active = 1
-            ''')
-            
-            total_tasks = cursor.fetchone()[0]
-            conn.close()
+            with self._db_lock:
+                conn = self._get_connection()
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT COUNT(*) FROM scheduled_tasks WHERE is_active = 1
+                ''')
+                
+                total_tasks = cursor.fetchone()[0]
             
-            return f"""
-⏰ 定时任务插件状态
-
-✅ 运行状态: {'运行中' if self.is_running else '已停止'}
-🔄 调度器状态: {'运行中' if self.is_scheduler_running else '已停止'}
-📊 总任务数: {total_tasks}
-📅 数据库: {self.db_path}
-
-💡 提示：
-• 使用 /scheduler help 查看详细帮助
-• 使用 /scheduler list 查看您的任务
-            """
+            return _STATUS_TEMPLATE.substitute(
+                running='运行中' if self.is_running else '已停止',
+                scheduler='运行中' if self.is_scheduler_running else '已停止',
+                total_tasks=total_tasks,
+                db_path=self.db_path,
+            )
             
         except Exception as e:
             logger.error(f"获取调度器状态失败: {e}")
-            return "获取状态失败" 
\ No newline at end of file
+            return "获取状态失败"
+    
+    # 子命令 -> 处理方法，execute_command 一次查表完成分发，处理方法只接收子命令之后的参数
+    _DISPATCH = {
+        "add": _add_scheduled_task,
+        "list": lambda self, args, user_id: self._list_scheduled_tasks(user_id),
+        "delete": _delete_scheduled_task,
+        "help": lambda self, args, user_id: self.get_help(),
+        "status": lambda self, args, user_id: self._get_scheduler_status(),
+    }
+
+
+# 供插件管理器直接定位插件类
+PLUGIN_CLASS = SchedulerPlugin
@@ -4,168 +4,363 @@
 用于测试各个功能模块
 """
 
-import sys
 import os
+import sys
 from pathlib import Path
 
-# 添加项目根目录到Python路径
-project_root = Path(__file__).parent
-sys.path.insert(0, str(project_root))
+import pytest
 
 from core.config_manager import ConfigManager
 from core.plugin_manager import PluginManager
-from plugins.file_converter import FileConverterPlugin
-from plugins.scheduler import SchedulerPlugin
-from plugins.news_pusher import NewsPusherPlugin
-from plugins.help import HelpPlugin
-from loguru import logger
+from core.base_plugin import BasePlugin
 
+# 各帮助文本中应包含的标识
+_MARK_FILE_CONV = "文件转换插件帮助"
+_MARK_SCHEDULER = "定时任务插件帮助"
+_MARK_NEWS = "新闻推送插件帮助"
+_MARK_HELP = "帮助插件"
+_MARK_BOT = "微信工具机器人"
+_MARK_BOT_HELP = "微信工具机器人帮助"
 
-def test_config_manager():
-    """测试配置管理器"""
-    print("🔧 测试配置管理器...")
-    
+
+@pytest.fixture(scope="session")
+def config():
+    """整个测试会话共用一份配置，只读取解析一次配置文件"""
+    return ConfigManager("config/config.yaml")
+
+
+@pytest.fixture
+def isolated_config(tmp_path):
+    """数据库等运行数据写入临时目录的配置，修改只影响本测试"""
     config = ConfigManager("config/config.yaml")
-    
+    config.set("database.path", str(tmp_path / "bot.db"))
+    config.set("news.subscribers_file", str(tmp_path / "news_subscribers.json"))
+    return config
+
+
+@pytest.fixture(scope="session")
+def plugin_manager(config):
+    """整个测试会话共用一个插件管理器，插件只加载、实例化一次"""
+    manager = PluginManager(config)
+    manager.load_plugins()
+    return manager
+
+
+def test_config_manager(config):
+    """测试配置管理器"""
     # 测试配置读取
     assert config.get("wechat.login_timeout") == 300
     assert config.get("file_processing.max_file_size") == 50
     assert config.get("logging.level") == "INFO"
+    assert config.get("logging.missing", "default") == "default"
     
-    print("✅ 配置管理器测试通过")
+    # 测试配置写入后读取，结束后恢复，避免影响共用该配置的其他测试
+    config.set("logging.level", "DEBUG")
+    assert config.get("logging.level") == "DEBUG"
+    config.set("logging.level", "INFO")
 
 
-def test_plugins():
-    """测试插件系统"""
-    print("📦 测试插件系统...")
+def test_config_cache_isolation():
+    """测试共享的配置缓存不会被某个实例修改"""
+    first = ConfigManager("config/config.yaml")
     
-    config = ConfigManager("config/config.yaml")
-    plugin_manager = PluginManager(config)
+    # get() 返回普通的 list/dict 副本，修改它们不会影响共享缓存
+    enabled = first.get("plugins.enabled")
+    assert isinstance(enabled, list) and isinstance(first.get("logging"), dict)
+    enabled.append("evil")
+    first.get("logging")["level"] = "DEBUG"
+    assert "evil" not in first.get("plugins.enabled")
+    assert first.get("logging.level") == "INFO"
     
-    # 测试插件加载
-    plugin_manager.load_plugins()
+    # set() 只修改本实例的副本
+    first.set("logging.level", "DEBUG")
+    second = ConfigManager("config/config.yaml")
+    assert second.get("logging.level") == "INFO"
+    assert "evil" not in second.get("plugins.enabled")
+
+
+def test_config_empty_file(tmp_path):
+    """测试空的配置文件按空配置处理"""
+    path = tmp_path / "empty.yaml"
+    path.write_text("", encoding="utf-8")
+    config = ConfigManager(str(path))
+    assert config.get("logging.level", "INFO") == "INFO"
+    assert config.get_all() == {}
+
+
+def test_config_sidecar_ignores_older_yaml(tmp_path):
+    """测试 YAML 被替换为 mtime 更旧的版本后不再使用过期的 JSON 旁路缓存"""
+    path = tmp_path / "config.yaml"
+    path.write_text(Path("config/config.yaml").read_text(encoding="utf-8"), encoding="utf-8")
+    assert ConfigManager(str(path)).get("logging.level") == "INFO"
+    assert (tmp_path / "config.yaml.json").exists()
     
-    # 检查插件状态
+    # 等长修改并把 mtime 回拨，模拟 cp -p / git checkout 恢复旧版本
+    st = path.stat()
+    path.write_text(path.read_text(encoding="utf-8").replace('"INFO"', '"WARN"'), encoding="utf-8")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - 10**9))
+    assert ConfigManager(str(path)).get("logging.level") == "WARN"
+
+
+def test_plugins(plugin_manager):
+    """测试插件系统"""
+    # 检查插件状态：预加载的插件都已加载
     status = plugin_manager.get_status()
-    print(f"📊 插件状态: {status}")
+    assert set(plugin_manager._get_preload_plugins()) <= set(status["loaded_plugins"])
+    assert status["total_plugins"] == len(status["loaded_plugins"])
     
-    print("✅ 插件系统测试通过")
+    # 返回的是缓存快照的副本，修改不会影响下一次查询
+    status["loaded_plugins"].append("bogus")
+    for details in status["plugin_details"].values():
+        details["is_running"] = None
+    fresh = plugin_manager.get_status()
+    assert "bogus" not in fresh["loaded_plugins"]
+    assert all(details["is_running"] is not None for details in fresh["plugin_details"].values())
 
 
-def test_file_converter():
-    """测试文件转换插件"""
-    print("📁 测试文件转换插件...")
+def test_message_handler(config):
+    """测试消息处理器"""
+    # 消息处理器依赖 itchat，只在用到时导入
+    from core.message_handler import MessageHandler
     
-    config = ConfigManager("config/config.yaml")
-    plugin = FileConverterPlugin(config)
+    handler = MessageHandler(config)
     
-    # 测试插件启动
-    plugin.start()
-    assert plugin.is_running == True
+    # 测试系统命令匹配
+    assert _MARK_BOT_HELP in handler.execute_command("帮助", "test_user")
+    assert _MARK_BOT_HELP in handler.execute_command("HELP", "test_user")
+    assert handler.execute_command("help me", "test_user").startswith("未知命令")
+
+
+# 插件名 -> 帮助信息中应包含的标识
+_PLUGIN_CASES = [
+    ("file_converter", _MARK_FILE_CONV),
+    ("scheduler", _MARK_SCHEDULER),
+    ("news_pusher", _MARK_NEWS),
+    ("help", _MARK_HELP),
+]
+
+
+@pytest.mark.parametrize("name, marker", _PLUGIN_CASES,
+                         ids=[name for name, _ in _PLUGIN_CASES])
+def test_plugin_lifecycle(plugin_manager, name, marker):
+    """测试插件启动、帮助信息和停止"""
+    # 未预加载的插件在首次获取时加载
+    plugin = plugin_manager.get_plugin(name)
+    assert isinstance(plugin, BasePlugin)
     
-    # 测试帮助信息
-    help_text = plugin.get_help()
-    assert "文件转换插件帮助" in help_text
+    # 测试插件启动，离开 with 时自动停止
+    with plugin:
+        assert plugin.is_running
+        
+        # 测试帮助信息
+        assert marker in plugin.get_help()
     
     # 测试插件停止
-    plugin.stop()
-    assert plugin.is_running == False
-    
-    print("✅ 文件转换插件测试通过")
+    assert not plugin.is_running
 
 
-def test_scheduler():
-    """测试定时任务插件"""
-    print("⏰ 测试定时任务插件...")
+def test_file_converter(plugin_manager, tmp_path, monkeypatch):
+    """测试文件转换插件"""
+    plugin = plugin_manager.get_plugin("file_converter")
     
-    config = ConfigManager("config/config.yaml")
-    plugin = SchedulerPlugin(config)
+    # 测试文件类型识别
+    assert plugin._get_file_type(".DOCX") == "word"
+    assert plugin._get_file_type(".pdf") == "pdf"
+    assert plugin._get_file_type(".JPG") == "image"
+    assert plugin._get_file_type(".txt") is None
     
-    # 测试插件启动
-    plugin.start()
-    assert plugin.is_running == True
+    # 配置了但没有对应转换方法的类型按不支持处理
+    text_file = tmp_path / "notes.txt"
+    text_file.write_text("hello", encoding="utf-8")
+    monkeypatch.setitem(plugin._ext_to_type, ".txt", "text")
+    monkeypatch.setattr(plugin, "_ext_cache", {})
+    assert plugin.handle_file_upload(str(text_file), "notes.txt", "test_user") == "不支持的文件格式"
+
+
+def test_file_converter_restart_uses_new_queue(isolated_config):
+    """测试停止时发送线程未能及时结束，重新启动后两个发送线程不共用同一个队列"""
+    import threading
+    from plugins.file_converter import FileConverterPlugin
     
-    # 测试帮助信息
-    help_text = plugin.get_help()
-    assert "定时任务插件帮助" in help_text
+    plugin = FileConverterPlugin(isolated_config)
+    plugin.start()
+    old_thread, old_queue = plugin._sender_thread, plugin._send_queue
     
-    # 测试插件停止
+    # 让旧发送线程卡在一次发送中，stop() 的 join 超时返回
+    release = threading.Event()
+    plugin._handle_output = lambda path, user_id: release.wait()
+    old_queue.put(("busy", "test_user"))
+    old_thread.join = lambda timeout=None: None
     plugin.stop()
-    assert plugin.is_running == False
     
-    print("✅ 定时任务插件测试通过")
+    plugin.start()
+    try:
+        assert plugin._sender_thread is not old_thread
+        assert plugin._send_queue is not old_queue
+    finally:
+        release.set()
+        plugin.stop()
+    old_thread.join = threading.Thread.join.__get__(old_thread)
+    old_thread.join(timeout=5)
+    assert not old_thread.is_alive()
 
 
-def test_news_pusher():
-    """测试新闻推送插件"""
-    print("📰 测试新闻推送插件...")
+def test_pdf_to_word(plugin_manager, tmp_path, monkeypatch):
+    """测试PDF转Word"""
+    import fitz
+    from docx import Document
     
-    config = ConfigManager("config/config.yaml")
-    plugin = NewsPusherPlugin(config)
+    plugin = plugin_manager.get_plugin("file_converter")
     
-    # 测试插件启动
-    plugin.start()
-    assert plugin.is_running == True
+    # 生成一份两页的PDF
+    pdf_path = tmp_path / "sample.pdf"
+    with fitz.open() as pdf:
+        for text in ("first page", "second page"):
+            pdf.new_page().insert_text((72, 72), text)
+        pdf.save(pdf_path)
     
-    # 测试帮助信息
-    help_text = plugin.get_help()
-    assert "新闻推送插件帮助" in help_text
+    # 记录交给发送线程的文件，不实际发送
+    sent = []
+    monkeypatch.setattr(plugin, "_enqueue_output", lambda path, user_id=None: sent.append((path, user_id)))
     
-    # 测试插件停止
-    plugin.stop()
-    assert plugin.is_running == False
+    output_path = tmp_path / "sample.docx"
+    result = plugin._convert_pdf_to_word(str(pdf_path), "sample.pdf", str(output_path), "test_user")
+    assert result.startswith("✅")
+    assert sent == [(str(output_path), "test_user")]
     
-    print("✅ 新闻推送插件测试通过")
+    paragraphs = [para.text for para in Document(output_path).paragraphs]
+    assert paragraphs == ["first page", "second page"]
 
 
-def test_help():
+def test_help(plugin_manager):
     """测试帮助插件"""
-    print("📖 测试帮助插件...")
+    plugin = plugin_manager.get_plugin("help")
     
-    config = ConfigManager("config/config.yaml")
-    plugin = HelpPlugin(config)
+    # 测试主帮助
+    assert _MARK_BOT in plugin.get_main_help()
+
+
+def test_news_subscribers_file(isolated_config):
+    """测试订阅用户从旧数据库表迁移到 JSON 文件，并在订阅/取消订阅后保持一致"""
+    import json
+    import sqlite3
+    from plugins.news_pusher import NewsPusherPlugin
     
-    # 测试插件启动
-    plugin.start()
-    assert plugin.is_running == True
+    # 旧版本把订阅用户存放在 news_subscribers 表中
+    with sqlite3.connect(isolated_config.get("database.path")) as conn:
+        conn.execute("CREATE TABLE news_subscribers (user_id TEXT PRIMARY KEY, "
+                     "subscribed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+        conn.executemany("INSERT INTO news_subscribers (user_id) VALUES (?)", [("alice",), ("bob",)])
+    conn.close()
     
-    # 测试帮助信息
-    help_text = plugin.get_help()
-    assert "帮助插件" in help_text
+    subscribers_file = Path(isolated_config.get("news.subscribers_file"))
+    assert not subscribers_file.exists()
     
-    # 测试主帮助
-    main_help = plugin.get_main_help()
-    assert "微信工具机器人" in main_help
+    plugin = NewsPusherPlugin(isolated_config)
+    assert plugin.subscribers == {"alice", "bob"}
+    assert json.loads(subscribers_file.read_text(encoding="utf-8")) == ["alice", "bob"]
     
-    # 测试插件停止
+    assert plugin.execute_command("subscribe", user_id="carol").startswith("✅")
+    assert plugin.execute_command("subscribe", user_id="carol") == "您已经订阅了新闻推送"
+    assert plugin.execute_command("unsubscribe", user_id="alice") == "✅ 已取消订阅"
+    assert plugin.execute_command("unsubscribe", user_id="alice") == "您还没有订阅新闻推送"
+    assert json.loads(subscribers_file.read_text(encoding="utf-8")) == ["bob", "carol"]
     plugin.stop()
-    assert plugin.is_running == False
     
-    print("✅ 帮助插件测试通过")
+    # 重新加载时读取文件，不再从数据库迁移
+    reloaded = NewsPusherPlugin(isolated_config)
+    assert reloaded.subscribers == {"bob", "carol"}
+    reloaded.stop()
 
 
-def main():
-    """主测试函数"""
-    print("🧪 开始测试微信工具机器人...")
-    print("=" * 50)
+def test_news_unknown_source(isolated_config, monkeypatch):
+    """测试配置的新闻源没有对应数据时仍能获取到新闻"""
+    from plugins.news_pusher import NewsPusherPlugin, _MOCK_NEWS
     
+    plugin = NewsPusherPlugin(isolated_config)
     try:
-        test_config_manager()
-        test_plugins()
-        test_file_converter()
-        test_scheduler()
-        test_news_pusher()
-        test_help()
+        # 只配置一个没有数据的新闻源
+        monkeypatch.setattr(plugin, "news_sources", ["https://example.com/"])
+        news_list = plugin._fetch_latest_news()
+        assert len(news_list) == sum(len(items) for items in _MOCK_NEWS.values())
+        assert {news["url"] for news in news_list} == set(_MOCK_NEWS)
         
-        print("=" * 50)
-        print("🎉 所有测试通过！")
-        return 0
+        # 已知新闻源只返回自己的新闻
+        known = next(iter(_MOCK_NEWS))
+        monkeypatch.setattr(plugin, "news_sources", ["https://example.com/", known])
+        assert {news["url"] for news in plugin._fetch_latest_news()} == {known}
+    finally:
+        plugin.stop()
+
+
+def test_scheduler_commands(isolated_config, monkeypatch):
+    """测试定时任务命令的解析、一次性任务的执行和删除"""
+    from datetime import datetime, timedelta
+    import itchat
+    import schedule
+    from plugins.scheduler import SchedulerPlugin
+    
+    # 记录发送的消息，不实际发送
+    sent = []
+    monkeypatch.setattr(itchat, "send_msg", lambda msg, toUserName=None: sent.append((toUserName, msg)))
+    
+    plugin = SchedulerPlugin(isolated_config)
+    run = lambda command: plugin.execute_command(command, user_id="test_user")
+    try:
+        # 各类型的时间占用不同数量的字段，其余部分都是消息
+        assert "时间: 09:00\n消息: 早安提醒" in run("add daily 09:00 早安提醒")
+        assert "时间: 1 18:00\n消息: 周会 提醒" in run("add weekly 1 18:00 周会 提醒")
+        assert "时间: 2000-01-01 10:00\n消息: 新年快乐" in run("add once 2000-01-01 10:00 新年快乐")
+        
+        for command in ("add daily 9:00 x", "add daily 25:00 x", "add weekly 7 18:00 x",
+                        "add once 2030-13-01 10:00 x", "add hourly 09:00 x"):
+            assert run(command) == "时间格式错误，请检查格式"
+        assert run("add daily 09:00").startswith("命令格式错误")
+        assert run("add weekly 1").startswith("命令格式错误")
+        assert run("bogus").startswith("未知命令")
+        assert run("listall").startswith("未知命令")
         
-    except Exception as e:
-        print(f"❌ 测试失败: {e}")
-        logger.error(f"测试失败: {e}")
-        return 1
+        # 已过期的一次性任务到点执行一次后取消自身，并在数据库中失效
+        job = plugin._jobs[3]
+        job.next_run = datetime.now() - timedelta(seconds=1)
+        schedule.run_pending()
+        assert sent == [("test_user", "新年快乐")]
+        assert job not in schedule.jobs
+        assert 3 not in plugin._jobs
+        listing = run("list")
+        assert "早安提醒" in listing and "周会 提醒" in listing and "新年快乐" not in listing
+        
+        # 删除任务
+        assert run("delete 1") == "✅ 任务 1 已删除"
+        assert run("delete 1") == "任务不存在或您没有权限删除"
+        assert run("delete x") == "任务ID必须是数字"
+        assert run("delete") == "请指定要删除的任务ID"
+        assert "早安提醒" not in run("list")
+    finally:
+        plugin.stop()
+
+
+def test_scheduler_stop_cancels_jobs(isolated_config):
+    """测试停止插件时取消其注册的任务，重新加载后删除的任务不再触发"""
+    import schedule
+    from plugins.scheduler import SchedulerPlugin
+    
+    old = SchedulerPlugin(isolated_config)
+    with old:
+        assert "任务ID: 1" in old.execute_command("add daily 09:00 hi", user_id="test_user")
+        job = old._jobs[1]
+        assert job in schedule.jobs
+    assert job not in schedule.jobs
+    
+    # 模拟重新加载：新实例启动时从数据库恢复任务
+    new = SchedulerPlugin(isolated_config)
+    with new:
+        job = new._jobs[1]
+        assert job in schedule.jobs
+        assert "已删除" in new.execute_command("delete 1", user_id="test_user")
+        assert job not in schedule.jobs
+        assert not new._jobs
 
 
 if __name__ == "__main__":
-    sys.exit(main()) 
\ No newline at end of file
+    sys.exit(pytest.main([__file__, "-x", "-q"]))
\ No newline at end of file